@@ -1,6 +1,14 @@
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from posts.cache import cached_page
 
+static_page = method_decorator(
+    cached_page(lambda request: [], shared=True), name='dispatch'
+)
+
+
+@static_page
 class AboutAuthorView(TemplateView):
     template_name = 'about/author.html'
 
@@ -9,6 +17,7 @@ class AboutAuthorView(TemplateView):
         return context
 
 
+@static_page
 class AboutTechView(TemplateView):
     template_name = 'about/tech.html'
 
@@ -0,0 +1,87 @@
+"""Keyset-пагинация строк ``values()`` для API.
+
+Курсор хранит значения полей сортировки последней выданной строки,
+следующая страница выбирается условием WHERE по ним, без OFFSET
+и COUNT(*).
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from posts.utils import InvalidCursor
+
+
+def _plain(value):
+    # Полная точность: DjangoJSONEncoder округляет время до миллисекунд.
+    return value.isoformat()
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_plain)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def decode_cursor(token, model, ordering):
+    """Значения полей сортировки из курсора, приведённые к типам полей."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        return [
+            _field(model, name.lstrip('-')).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except (binascii.Error, UnicodeError, ValueError, ValidationError):
+        raise InvalidCursor('Некорректный курсор')
+
+
+def _seek(ordering, values):
+    """Строки строго после позиции ``values`` в порядке ``ordering``."""
+    condition = Q()
+    for index, name in enumerate(ordering):
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        equal = {
+            previous.lstrip('-'): value
+            for previous, value in zip(ordering[:index], values)
+        }
+        equal[f'{name.lstrip("-")}__{lookup}'] = values[index]
+        condition |= Q(**equal)
+    return condition
+
+
+class KeysetPage:
+    """Страница строк после курсора, читаемая по мере выдачи.
+
+    ``next_cursor`` известен после того, как строки прочитаны до конца,
+    поэтому ответ может выдавать их потоком.
+    """
+
+    def __init__(self, queryset, ordering, cursor, limit):
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.limit = limit
+        if cursor:
+            queryset = queryset.filter(_seek(
+                ordering, decode_cursor(cursor, queryset.model, ordering)
+            ))
+        self.queryset = queryset.order_by(*ordering)[:limit + 1]
+        self.next_cursor = None
+
+    def __iter__(self):
+        last = None
+        for number, row in enumerate(self.queryset.iterator()):
+            if number == self.limit:
+                self.next_cursor = encode_cursor(
+                    [last[field] for field in self.fields]
+                )
+                return
+            last = row
+            yield row
@@ -0,0 +1,108 @@
+"""Описание ресурсов API: публичные поля и их пути в ``values()``.
+
+Связанные объекты (автор, группа, статистика) выбираются через пути
+вида ``author__username``, поэтому строка ресурса собирается одним
+запросом с JOIN без создания экземпляров моделей.
+"""
+from django.core.files.storage import default_storage
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def media_url(request, path):
+    if not path:
+        return None
+    return request.build_absolute_uri(default_storage.url(path))
+
+
+class Resource:
+    def __init__(self, fields, ordering, transforms=None):
+        self.fields = fields
+        self.ordering = ordering
+        self.transforms = transforms or {}
+
+    def parse_fields(self, value):
+        """Поля из ``?fields=a,b``; по умолчанию все поля ресурса."""
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(self.fields))
+        if unknown:
+            raise ApiError('Неизвестные поля: ' + ', '.join(unknown))
+        return names
+
+    def values(self, queryset, names):
+        """Запрос только нужных колонок и полей сортировки."""
+        lookups = {self.fields[name] for name in names}
+        lookups.update(name.lstrip('-') for name in self.ordering)
+        return queryset.values(*sorted(lookups))
+
+    def serialize(self, request, row, names):
+        item = {}
+        for name in names:
+            value = row[self.fields[name]]
+            transform = self.transforms.get(name)
+            item[name] = transform(request, value) if transform else value
+        return item
+
+
+posts = Resource(
+    {
+        'id': 'pk',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    },
+    ordering=('-pub_date', '-pk'),
+    transforms={'image': media_url},
+)
+
+comments = Resource(
+    {
+        'id': 'pk',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    ordering=('created', 'pk'),
+)
+
+groups = Resource(
+    {
+        'id': 'pk',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    },
+    ordering=('pk',),
+)
+
+profiles = Resource(
+    {
+        'id': 'pk',
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'posts_count': 'stats__posts_count',
+        'followers_count': 'stats__followers_count',
+    },
+    ordering=('pk',),
+)
+
+follows = Resource(
+    {
+        'id': 'pk',
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+    ordering=('-pk',),
+)
@@ -0,0 +1,173 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def content(response):
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return json.loads(response.content)
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(5)
+        ]
+        cls.post = cls.posts[-1]
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:v1:{name}', args=args), params)
+
+    def collect(self, name, *args, **params):
+        """Все страницы списка, проходя по ссылкам ``next``."""
+        results = []
+        data = content(self.get(name, *args, **params))
+        results.extend(data['results'])
+        while data['next']:
+            data = content(self.client.get(data['next']))
+            results.extend(data['results'])
+        return results
+
+    def test_post_list(self):
+        response = self.get('posts')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        item = content(response)['results'][0]
+        self.assertEqual(item, {
+            'id': self.post.pk,
+            'text': 'Пост 4',
+            'pub_date': item['pub_date'],
+            'author': 'author',
+            'group': 'test-slug',
+            'image': None,
+            'comments_count': 3,
+        })
+
+    def test_cursor_pagination(self):
+        """Страницы по курсору проходят все посты ровно один раз."""
+        posts = self.collect('posts', limit=2)
+        self.assertEqual(
+            [post['id'] for post in posts],
+            [post.pk for post in reversed(self.posts)]
+        )
+        comments = self.collect('comments', self.post.pk, limit=2)
+        self.assertEqual(
+            [comment['text'] for comment in comments],
+            [f'Комментарий {i}' for i in range(3)]
+        )
+
+    def test_sparse_fields(self):
+        data = content(self.get('posts', fields='id,author', limit=1))
+        self.assertEqual(
+            data['results'], [{'id': self.post.pk, 'author': 'author'}]
+        )
+        with self.assertNumQueries(1):
+            data = content(self.get('profile', 'author', fields='username'))
+        self.assertEqual(data, {'username': 'author'})
+
+    def test_filters_and_details(self):
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Чужой пост')
+        posts = self.collect('posts', author='other')
+        self.assertEqual([post['text'] for post in posts], ['Чужой пост'])
+        posts = self.collect('posts', group='test-slug')
+        self.assertEqual(len(posts), 5)
+        self.assertEqual(
+            content(self.get('post', self.post.pk))['text'], 'Пост 4'
+        )
+        self.assertEqual(
+            content(self.get('group', 'test-slug'))['title'],
+            'Тестовая группа'
+        )
+        self.assertEqual(
+            [group['slug'] for group in self.collect('groups')],
+            ['test-slug']
+        )
+        profile = content(self.get('profile', 'author'))
+        self.assertEqual(profile['posts_count'], 5)
+        self.assertEqual(profile['followers_count'], 1)
+
+    def test_profile_counters_not_stale(self):
+        content(self.get('profile', 'author'))
+        Post.objects.create(author=self.author, text='Новый пост')
+        Follow.objects.filter(user=self.reader).delete()
+        profile = content(self.get('profile', 'author'))
+        self.assertEqual(profile['posts_count'], 6)
+        self.assertEqual(profile['followers_count'], 0)
+
+    def test_follows(self):
+        followers = self.collect('followers', 'author')
+        following = self.collect('following', 'reader')
+        self.assertEqual(followers, following)
+        self.assertEqual(
+            followers, [{'id': followers[0]['id'], 'user': 'reader',
+                         'author': 'author'}]
+        )
+
+    def test_errors(self):
+        errors = {
+            self.get('posts', fields='id,password'): 400,
+            self.get('posts', limit='0'): 400,
+            self.get('posts', cursor='мусор'): 400,
+            self.get('post', 0): 404,
+            self.get('profile', 'missing'): 404,
+            self.get('comments', 0): 404,
+        }
+        for response, status in errors.items():
+            with self.subTest(status=status):
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', content(response))
+        response = self.client.post(reverse('api:v1:posts'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_list_cached_until_change(self):
+        """Список отдаётся из кэша до изменения поста."""
+        response = self.get('posts')
+        self.assertTrue(response.streaming)
+        content(response)
+        with self.assertNumQueries(0):
+            response = self.get('posts')
+        self.assertFalse(response.streaming)
+        Post.objects.create(author=self.reader, text='Новый пост')
+        data = content(self.get('posts'))
+        self.assertEqual(data['results'][0]['text'], 'Новый пост')
+
+    def test_comments_cache_invalidated(self):
+        content(self.get('comments', self.post.pk))
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый'
+        )
+        data = content(self.get('comments', self.post.pk))
+        self.assertEqual(len(data['results']), 4)
+
+    @override_settings(CACHE_TTL={'api': 0})
+    def test_uncached_endpoints_stream(self):
+        response = self.get('posts')
+        self.assertTrue(response.streaming)
+        self.assertTrue(self.get('posts').streaming)
@@ -0,0 +1,32 @@
+from django.urls import include, path
+
+from . import views
+
+app_name = 'api'
+
+v1 = [
+    path('posts/', views.post_list, name='posts'),
+    path('posts/<int:post_id>/', views.post_detail, name='post'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comments'
+    ),
+    path('groups/', views.group_list, name='groups'),
+    path('groups/<slug:slug>/', views.group_detail, name='group'),
+    path('profiles/<str:username>/', views.profile_detail, name='profile'),
+    path(
+        'profiles/<str:username>/followers/',
+        views.follower_list,
+        name='followers'
+    ),
+    path(
+        'profiles/<str:username>/following/',
+        views.following_list,
+        name='following'
+    ),
+]
+
+urlpatterns = [
+    path('v1/', include((v1, 'v1'))),
+]
@@ -0,0 +1,190 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from core.cache import api as api_cache
+from posts.cache import get_versions
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import InvalidCursor
+
+from . import resources
+from .pagination import KeysetPage
+from .resources import ApiError
+
+CONTENT_TYPE = 'application/json'
+
+
+def _dumps(value):
+    return json.dumps(
+        value, cls=DjangoJSONEncoder, ensure_ascii=False
+    ).encode()
+
+
+def api_view(view):
+    """Только GET, ошибки запроса отдаются как JSON ``{"detail": ...}``."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'detail': error.detail}, status=error.status)
+        except InvalidCursor as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+    return wrapper
+
+
+def _limit(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(
+            f'limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}'
+        )
+    return limit
+
+
+def _cache_key(request, endpoint, scopes):
+    parts = [request.get_host(), request.get_full_path()]
+    parts.extend(str(version) for version in get_versions(*scopes))
+    digest = hashlib.md5(':'.join(parts).encode()).hexdigest()
+    return f'{endpoint}:{digest}'
+
+
+def _store(chunks, key, timeout):
+    """Отдаёт части ответа и кэширует тело, когда оно выдано целиком."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    api_cache.set(key, b''.join(parts), timeout)
+
+
+def _cached(request, endpoint, scopes):
+    """Ключ, время жизни и закэшированное тело ответа эндпоинта.
+
+    Время жизни берётся из ``settings.CACHE_TTL['api']``, нулевое
+    отключает кэш. Ключ включает версии областей кэша, поэтому изменения
+    постов сразу дают новый ответ; эндпоинты без областей не кэшируются.
+    """
+    timeout = api_cache.timeout
+    if not timeout or not scopes:
+        return None, None, None
+    key = _cache_key(request, endpoint, scopes)
+    return key, timeout, api_cache.get(key)
+
+
+def _list(request, endpoint, resource, queryset, scopes=(), parent=None):
+    """Страница списка: строки сериализуются по мере чтения из базы.
+
+    ``parent`` — queryset объекта, которому принадлежит список; если
+    объекта нет, отдаётся 404, а не пустой список.
+    """
+    names = resource.parse_fields(request.GET.get('fields'))
+    page = KeysetPage(
+        resource.values(queryset, names),
+        resource.ordering,
+        request.GET.get('cursor'),
+        _limit(request),
+    )
+    key, timeout, content = _cached(request, endpoint, scopes)
+    if content is not None:
+        return HttpResponse(content, content_type=CONTENT_TYPE)
+    if parent is not None and not parent.exists():
+        raise ApiError('Не найдено', status=404)
+
+    def chunks():
+        yield b'{"results": ['
+        for number, row in enumerate(page):
+            item = _dumps(resource.serialize(request, row, names))
+            yield b',' + item if number else item
+        next_url = None
+        if page.next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = page.next_cursor
+            next_url = request.build_absolute_uri(
+                f'{request.path}?{query.urlencode()}'
+            )
+        yield b'], "next": ' + _dumps(next_url) + b'}'
+
+    body = chunks() if key is None else _store(chunks(), key, timeout)
+    return StreamingHttpResponse(body, content_type=CONTENT_TYPE)
+
+
+def _detail(request, endpoint, resource, queryset, scopes=()):
+    names = resource.parse_fields(request.GET.get('fields'))
+    key, timeout, content = _cached(request, endpoint, scopes)
+    if content is None:
+        row = resource.values(queryset, names).first()
+        if row is None:
+            raise ApiError('Не найдено', status=404)
+        content = _dumps(resource.serialize(request, row, names))
+        if key is not None:
+            api_cache.set(key, content, timeout)
+    return HttpResponse(content, content_type=CONTENT_TYPE)
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return _list(request, 'posts', resources.posts, posts, ['feed'])
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(request, 'post', resources.posts,
+                   Post.objects.filter(pk=post_id), [f'post:{post_id}'])
+
+
+@api_view
+def comment_list(request, post_id):
+    return _list(request, 'comments', resources.comments,
+                 Comment.objects.filter(post_id=post_id), [f'post:{post_id}'],
+                 parent=Post.objects.filter(pk=post_id))
+
+
+@api_view
+def group_list(request):
+    return _list(request, 'groups', resources.groups, Group.objects.all(),
+                 ['groups'])
+
+
+@api_view
+def group_detail(request, slug):
+    return _detail(request, 'group', resources.groups,
+                   Group.objects.filter(slug=slug), ['groups'])
+
+
+@api_view
+def profile_detail(request, username):
+    # Не кэшируется: области версий ключатся по pk автора, и его поиск
+    # по username стоил бы столько же, сколько весь ответ — один запрос
+    # со счётчиками UserStats.
+    return _detail(request, 'profile', resources.profiles,
+                   User.objects.filter(username=username))
+
+
+@api_view
+def follower_list(request, username):
+    return _list(request, 'followers', resources.follows,
+                 Follow.objects.filter(author__username=username))
+
+
+@api_view
+def following_list(request, username):
+    return _list(request, 'following', resources.follows,
+                 Follow.objects.filter(user__username=username))
@@ -0,0 +1,377 @@
+"""Замеры задержки и числа SQL-запросов для нагрузочных сценариев.
+
+Сценарий — функция без аргументов, выполняющая один запрос. Для каждого
+сценария считаются перцентили задержки, среднее число SQL-запросов и
+пропускная способность. Результаты сохраняются в JSON как базовая линия
+и сравниваются с ней при следующих прогонах.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from .asgi import environ_from_scope
+
+
+def percentile(values, rank):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def measure(scenario, iterations, warmup=0, before=None):
+    """Прогоняет сценарий и возвращает сводку замеров.
+
+    ``before`` вызывается перед каждой итерацией вне замера, например
+    чтобы сбросить кэш.
+    """
+    for _ in range(warmup):
+        if before is not None:
+            before()
+        scenario()
+    latencies = []
+    queries = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            scenario()
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(context.captured_queries))
+    total = sum(latencies)
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries': round(sum(queries) / iterations, 2),
+        'rps': round(iterations / total, 1) if total else None,
+    }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, results, meta=None):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {'meta': meta or {}, 'results': results},
+            file, ensure_ascii=False, indent=2, sort_keys=True
+        )
+        file.write('\n')
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно базовой линии.
+
+    Регрессией считается рост p95 больше чем на ``tolerance`` (доля)
+    или любое увеличение числа SQL-запросов.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} -> '
+                f'{current["p95_ms"]} мс'
+            )
+    return regressions
+
+
+def format_table(results, baseline=None):
+    """Таблица результатов с изменением p95 к базовой линии."""
+    header = (
+        f'{"сценарий":<24}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        f'{"запросов":>10}{"зап/с":>10}'
+    )
+    lines = [header]
+    previous_results = (baseline or {}).get('results', {})
+    for name, result in results.items():
+        line = (
+            f'{name:<24}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+            f'{result["p99_ms"]:>10.2f}{result["queries"]:>10g}'
+            f'{result["rps"] or 0:>10.1f}'
+        )
+        previous = previous_results.get(name)
+        if previous and previous['p95_ms']:
+            change = result['p95_ms'] / previous['p95_ms'] - 1
+            line += f'  p95 {change:+.0%}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def http_scope(path, cookie=''):
+    """ASGI scope запроса GET; из него же строится WSGI environ."""
+    path, _, query = path.partition('?')
+    headers = [(b'host', b'testserver')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': headers,
+        'server': ('testserver', 80),
+    }
+
+
+def _throughput(latencies, total, concurrency):
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'rps': round(len(latencies) / total, 1) if total else None,
+    }
+
+
+def _check_status(path, status):
+    if status != 200:
+        raise RuntimeError(f'{path}: {status}')
+
+
+def run_wsgi(application, path, requests, concurrency, cookie=''):
+    """``requests`` запросов к WSGI-приложению из ``concurrency`` потоков,
+    как у многопоточного WSGI-сервера."""
+    def call(_):
+        statuses = []
+        environ = environ_from_scope(http_scope(path, cookie))
+        started = time.perf_counter()
+        result = application(
+            environ,
+            lambda status, headers, exc_info=None: statuses.append(status)
+        )
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        latency = time.perf_counter() - started
+        _check_status(path, int(statuses[0].split()[0]))
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(call, range(requests)))
+    return _throughput(
+        latencies, time.perf_counter() - started, concurrency
+    )
+
+
+def run_asgi(application, path, requests, concurrency, cookie=''):
+    """``requests`` запросов к ASGI-приложению, не больше
+    ``concurrency`` одновременно, в одном цикле событий."""
+    async def call(semaphore):
+        messages = [{'type': 'http.request', 'body': b''}]
+        sent = []
+
+        async def receive():
+            return messages.pop() if messages else {
+                'type': 'http.disconnect'
+            }
+
+        async def send(message):
+            sent.append(message)
+
+        async with semaphore:
+            started = time.perf_counter()
+            await application(http_scope(path, cookie), receive, send)
+            latency = time.perf_counter() - started
+        _check_status(path, sent[0]['status'])
+        return latency
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(call(semaphore) for _ in range(requests))
+        )
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return _throughput(
+        latencies, time.perf_counter() - started, concurrency
+    )
+
+
+def format_servers(results):
+    """Таблица сравнения серверов: сценарий -> {сервер: замеры}."""
+    lines = [
+        f'{"сценарий":<24}{"сервер":>8}{"p50, мс":>10}{"p95, мс":>10}'
+        f'{"зап/с":>10}'
+    ]
+    for name, servers in results.items():
+        for server, result in servers.items():
+            lines.append(
+                f'{name:<24}{server:>8}{result["p50_ms"]:>10.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["rps"] or 0:>10.1f}'
+            )
+    return '\n'.join(lines)
+
+
+def clone_sqlite(alias, path):
+    """Копия базы SQLite ``alias`` в файл ``path`` через backup API.
+
+    Соединение ``alias`` не должно держать открытую транзакцию: backup
+    ждёт её завершения.
+    """
+    source = connections[alias]
+    source.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+def run_mixed(workers, duration):
+    """Выполняет функции в отдельных потоках в течение ``duration`` секунд.
+
+    ``workers`` — список пар (вид, функция). Для каждого вида считаются
+    успешные операции, их перцентили и ошибки базы, например
+    «database is locked».
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop(kind, function):
+        own, failed = [], 0
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    function()
+                except DatabaseError:
+                    failed += 1
+                    continue
+                own.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        with lock:
+            latencies[kind].extend(own)
+            errors[kind] += failed
+
+    threads = [
+        threading.Thread(target=loop, args=worker) for worker in workers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        kind: {
+            'ops': len(latencies[kind]),
+            'errors': errors[kind],
+            'ops_per_s': round(len(latencies[kind]) / duration, 1),
+            'p95_ms': round(percentile(latencies[kind], 95) * 1000, 3)
+            if latencies[kind] else None,
+        }
+        for kind in sorted({kind for kind, _ in workers})
+    }
+
+
+def format_mixed(results):
+    """Таблица смешанной нагрузки: профиль -> {вид: замеры}."""
+    lines = [
+        f'{"профиль":<12}{"операция":>10}{"оп/с":>10}{"p95, мс":>10}'
+        f'{"ошибок":>10}'
+    ]
+    for profile, kinds in results.items():
+        for kind, result in kinds.items():
+            lines.append(
+                f'{profile:<12}{kind:>10}{result["ops_per_s"]:>10.1f}'
+                f'{result["p95_ms"] or 0:>10.2f}{result["errors"]:>10}'
+            )
+    return '\n'.join(lines)
+
+
+ASSET_URL = re.compile(r'(?:href|src)="([^"]+)"')
+STATIC_ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def page_assets(html, prefix):
+    """Адреса статики из HTML страницы в порядке появления, без повторов."""
+    assets = []
+    for url in ASSET_URL.findall(html):
+        if url.startswith(prefix) and url not in assets:
+            assets.append(url)
+    return assets
+
+
+def fetch_wsgi(application, path, accept_encoding=''):
+    """Один GET к WSGI-приложению: (код ответа, тело)."""
+    environ = environ_from_scope(http_scope(path))
+    environ['HTTP_ACCEPT_ENCODING'] = accept_encoding
+    statuses = []
+    result = application(
+        environ,
+        lambda status, headers, exc_info=None: statuses.append(status)
+    )
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return int(statuses[0].split()[0]), body
+
+
+def static_transfer(application, pages):
+    """Запросы статики на страницу и переданные байты по кодировкам.
+
+    ``pages`` — имя страницы -> адреса статики из её HTML. Файлы,
+    которых нет в собранной статике, считаются в ``missing``.
+    """
+    results = {}
+    for name, assets in pages.items():
+        result = {'requests': len(assets), 'missing': 0}
+        for encoding in STATIC_ENCODINGS:
+            result[encoding] = 0
+            for asset in assets:
+                status, body = fetch_wsgi(application, asset, encoding)
+                if status == 200:
+                    result[encoding] += len(body)
+                elif encoding == STATIC_ENCODINGS[0]:
+                    result['missing'] += 1
+        results[name] = result
+    return results
+
+
+def format_static(results):
+    """Таблица статики страниц: запросы и килобайты по кодировкам."""
+    lines = [
+        f'{"страница":<24}{"запросов":>10}{"нет":>6}'
+        + ''.join(f'{f"{encoding}, КБ":>14}' for encoding in STATIC_ENCODINGS)
+    ]
+    for name, result in results.items():
+        lines.append(
+            f'{name:<24}{result["requests"]:>10}{result["missing"]:>6}'
+            + ''.join(
+                f'{result[encoding] / 1024:>14.1f}'
+                for encoding in STATIC_ENCODINGS
+            )
+        )
+    return '\n'.join(lines)
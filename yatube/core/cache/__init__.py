@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+class Namespace:
+    """Область кэша со своим префиксом ключей и временем жизни.
+
+    Время жизни берётся из ``settings.CACHE_TTL`` по имени области,
+    поэтому ленты, страницы и ответы API настраиваются независимо
+    от бэкенда.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def timeout(self):
+        return settings.CACHE_TTL.get(self.name, DEFAULT_TIMEOUT)
+
+    def key(self, key):
+        return f'{self.name}:{key}'
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None):
+        return cache.get(self.key(key), default)
+
+    def get_many(self, keys):
+        made = {self.key(key): key for key in keys}
+        return {
+            made[key]: value
+            for key, value in cache.get_many(list(made)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        cache.set(self.key(key), value, self._timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        cache.set_many(
+            {self.key(key): value for key, value in data.items()},
+            self._timeout(timeout)
+        )
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        return cache.get_or_set(self.key(key), default, self._timeout(timeout))
+
+    def delete(self, key):
+        cache.delete(self.key(key))
+
+    def delete_many(self, keys):
+        cache.delete_many([self.key(key) for key in keys])
+
+
+feeds = Namespace('feeds')
+syndication = Namespace('syndication')
+api = Namespace('api')
+pages = Namespace('pages')
@@ -0,0 +1,53 @@
+"""Бэкенды кэша, которые считают попадания и промахи для core.metrics."""
+import threading
+
+from django.core.cache.backends import filebased, locmem
+
+from core import metrics
+
+from . import redis, sqlite
+
+_MISSING = object()
+
+
+class InstrumentedMixin:
+    """Считает попадания в ``get`` и ``get_many`` текущего запроса.
+
+    Базовый ``get_many`` вызывает ``get`` по каждому ключу, поэтому на
+    время ``get_many`` одиночные вызовы не учитываются.
+    """
+
+    _batch = threading.local()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        if not getattr(self._batch, 'active', False):
+            metrics.record_cache(int(hit), int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        self._batch.active = True
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            self._batch.active = False
+        metrics.record_cache(len(found), len(keys) - len(found))
+        return found
+
+
+class LocMemCache(InstrumentedMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(InstrumentedMixin, filebased.FileBasedCache):
+    pass
+
+
+class SQLiteCache(InstrumentedMixin, sqlite.SQLiteCache):
+    pass
+
+
+class RedisCache(InstrumentedMixin, redis.RedisCache):
+    pass
@@ -0,0 +1,215 @@
+"""Бэкенд кэша, говорящий на протоколе Redis (RESP2) без внешних пакетов."""
+import pickle
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    """Одно соединение с сервером: кодирование команд и разбор ответов."""
+
+    def __init__(self, host, port, db=0, password=None, timeout=None):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def _pack(self, args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise RedisError('Соединение закрыто сервером')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read() for _ in range(length)]
+        raise RedisError(f'Неизвестный ответ сервера: {line!r}')
+
+    def execute(self, *args):
+        self._sock.sendall(self._pack(args))
+        return self._read()
+
+    def pipeline(self, commands):
+        self._sock.sendall(b''.join(self._pack(args) for args in commands))
+        return [self._read() for _ in commands]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+class RedisCache(BaseCache):
+    """Кэш в Redis: ``LOCATION`` вида ``redis://[:password@]host:port/db``.
+
+    Целые числа хранятся как есть, чтобы ``incr`` выполнялся атомарно
+    на сервере, остальные значения сериализуются pickle.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        url = urlparse(location)
+        self._address = {
+            'host': url.hostname or '127.0.0.1',
+            'port': url.port or 6379,
+            'db': int(url.path.lstrip('/') or 0),
+            'password': url.password,
+            'timeout': params.get('OPTIONS', {}).get('SOCKET_TIMEOUT', 5),
+        }
+        self._local = threading.local()
+
+    @property
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = RedisConnection(**self._address)
+            self._local.client = client
+        return client
+
+    def _execute(self, *args):
+        try:
+            return self._client.execute(*args)
+        except (OSError, RedisError):
+            self._disconnect()
+            raise
+
+    def _pipeline(self, commands):
+        try:
+            return self._client.pipeline(commands)
+        except (OSError, RedisError):
+            self._disconnect()
+            raise
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        """Время жизни в миллисекундах для PX или None без срока."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    def _set_args(self, key, value, timeout, *flags):
+        ttl = self._ttl(timeout)
+        args = ['SET', key, self._encode(value), *flags]
+        if ttl is not None:
+            args.extend(['PX', ttl])
+        return ttl, args
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value)
+
+    @staticmethod
+    def _decode(value):
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl, args = self._set_args(key, value, timeout, 'NX')
+        if ttl == 0:
+            return False
+        return self._execute(*args) == 'OK'
+
+    def get(self, key, default=None, version=None):
+        value = self._decode(self._execute('GET', self._key(key, version)))
+        return default if value is None else value
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        if not made:
+            return {}
+        values = self._execute('MGET', *made)
+        return {
+            made[key]: self._decode(value)
+            for key, value in zip(made, values) if value is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        commands = []
+        for key, value in data.items():
+            key = self._key(key, version)
+            ttl, args = self._set_args(key, value, timeout)
+            commands.append(['DEL', key] if ttl == 0 else args)
+        if commands:
+            self._pipeline(commands)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl(timeout)
+        if ttl is None:
+            replies = self._pipeline([['PERSIST', key], ['EXISTS', key]])
+            return bool(replies[1])
+        return bool(self._execute('PEXPIRE', key, ttl))
+
+    def delete(self, key, version=None):
+        self._execute('DEL', self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._execute('DEL', *keys)
+
+    def has_key(self, key, version=None):
+        return bool(self._execute('EXISTS', self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self._execute('EXISTS', key):
+            raise ValueError(f"Key '{key}' not found")
+        return self._execute('INCRBY', key, delta)
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        """Соединения живут в потоке и переиспользуются между запросами."""
+
+    def _disconnect(self):
+        client = getattr(self._local, 'client', None)
+        if client is not None:
+            client.close()
+            self._local.client = None
@@ -0,0 +1,86 @@
+"""Сжатие gzip и brotli: выбор кодировки, сжатие целиком и потоком.
+
+Используется при сборке статики (``core.staticfiles``) и для ответов
+приложения (``core.middleware.CompressionMiddleware``). brotli не
+обязателен: без него всё сжимается только gzip.
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli не обязателен
+    brotli = None
+
+# Кодировка -> суффикс заранее сжатого файла, в порядке предпочтения.
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+MAX_LEVELS = {'br': 11, 'gzip': 9}
+
+
+def encodings():
+    """Кодировки, в которых можно сжимать в этом окружении."""
+    return [
+        encoding for encoding in SUFFIXES
+        if encoding != 'br' or brotli is not None
+    ]
+
+
+def accepted_encodings(header):
+    """Кодировки из ``Accept-Encoding`` с ненулевым q."""
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if encoding:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def negotiate(header, available=None):
+    """Лучшая из доступных кодировок, которую принимает клиент, или None."""
+    if available is None:
+        available = encodings()
+    accepted = accepted_encodings(header)
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(content, encoding, level=None):
+    """Сжимает байты целиком; ``level`` — уровень gzip или качество br,
+    по умолчанию наибольшие."""
+    if level is None:
+        level = MAX_LEVELS[encoding]
+    if encoding == 'br':
+        return brotli.compress(content, quality=level)
+    # mtime=0: одинаковый результат для одинакового содержимого.
+    return gzip.compress(content, level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level=6):
+    """Сжимает поток частей, сбрасывая сжатое после каждой части.
+
+    Клиент получает и распаковывает начало страницы, не дожидаясь
+    конца, ценой немного худшего сжатия.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,42 @@
+"""SQLite-бэкенд с PRAGMA на каждом новом соединении.
+
+В ``OPTIONS`` базы помимо аргументов ``sqlite3.connect`` принимаются:
+
+* ``pragmas`` — словарь PRAGMA, выполняемых при открытии соединения
+  (``journal_mode``, ``synchronous``, ``mmap_size``, ``cache_size``,
+  ``busy_timeout`` и т. п.);
+* ``transaction_mode`` — режим ``BEGIN`` для ``transaction.atomic``.
+  С ``IMMEDIATE`` блокировка на запись берётся в начале транзакции, и
+  конкурирующая запись ждёт ``busy_timeout``, а не падает с «database is
+  locked» при попытке повысить блокировку чтения до записи.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        if (self.transaction_mode is not None
+                and self.transaction_mode.upper() not in TRANSACTION_MODES):
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode: {self.transaction_mode}'
+            )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode.upper()}')
@@ -0,0 +1,18 @@
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def temporary_database(alias, settings_dict):
+    """Временно регистрирует базу ``alias`` в ``django.db.connections``."""
+    connections.databases[alias] = settings_dict
+    try:
+        yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections.databases[alias]
+        # Обёртка соединения кэшируется в потоке: без удаления следующий
+        # вызов с тем же alias получил бы старые настройки.
+        if hasattr(connections._connections, alias):
+            delattr(connections._connections, alias)
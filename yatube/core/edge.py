@@ -0,0 +1,34 @@
+"""Пользовательские фрагменты внутри общих закэшированных страниц.
+
+Тег ``{% edge 'includes/header.html' %}`` рендерит шаблон как
+``{% include %}`` и обрамляет результат комментариями-метками. Страница,
+закэшированная для анонимов, отдаётся вошедшему пользователю после
+``render_fragments``: размеченные фрагменты перерисовываются для его
+запроса, остальное тело страницы берётся из кэша как есть — аналог
+edge-side include на стороне приложения.
+
+Фрагменты рендерятся только из контекста запроса (``request``, ``user``
+и остальные контекст-процессоры), поэтому не должны зависеть от
+переменных представления.
+"""
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENT = re.compile(
+    r'<!--edge:(?P<name>[\w./-]+)-->.*?<!--/edge:(?P=name)-->', re.S
+)
+
+
+def mark(name, html):
+    return mark_safe(f'<!--edge:{name}-->{html}<!--/edge:{name}-->')
+
+
+def render_fragments(request, content):
+    """Тело страницы с фрагментами, перерисованными для ``request``."""
+    def fragment(match):
+        name = match['name']
+        return mark(name, render_to_string(name, request=request))
+
+    return FRAGMENT.sub(fragment, content.decode()).encode()
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.tasks import claim, execute
+
+
+def _execute_in_thread(task):
+    try:
+        return execute(task)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Разбирает очередь фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS,
+            help='Число потоков; при одном задачи выполняются без пула'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=settings.TASKS_BATCH,
+            help='Сколько задач забирать за один раз'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        executor = None
+        if workers > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='tasks'
+            )
+        done = failed = 0
+        try:
+            while True:
+                tasks = claim(options['batch'])
+                if not tasks:
+                    if options['once']:
+                        break
+                    time.sleep(settings.TASKS_POLL_INTERVAL)
+                    continue
+                if executor is None:
+                    results = [execute(task) for task in tasks]
+                else:
+                    results = list(executor.map(_execute_in_thread, tasks))
+                done += results.count(True)
+                failed += results.count(False)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core.templates import warm
+
+
+def _ms(seconds):
+    return '—' if seconds is None else f'{seconds * 1000:.2f}'
+
+
+class Command(BaseCommand):
+    help = ('Компилирует шаблоны проекта и выводит время компиляции '
+            'и рендеринга каждого')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Имена шаблонов; по умолчанию все шаблоны из DIRS'
+        )
+        parser.add_argument(
+            '--no-render', action='store_false', dest='render',
+            help='Только компилировать, без рендеринга с пустым контекстом'
+        )
+
+    def handle(self, *args, **options):
+        report = warm(options['names'], render=options['render'])
+        width = max([len(item['name']) for item in report] + [6])
+        self.stdout.write(
+            f'{"шаблон":<{width}}  {"компиляция, мс":>14}  '
+            f'{"рендеринг, мс":>13}'
+        )
+        for item in sorted(report, key=lambda item: -(item['compile'] or 0)):
+            line = (f'{item["name"]:<{width}}  {_ms(item["compile"]):>14}  '
+                    f'{_ms(item["render"]):>13}')
+            if item['error']:
+                line += f'  {item["error"]}'
+            self.stdout.write(line)
+        compiled = sum(item['compile'] or 0 for item in report)
+        cached = report and all(item['cached'] for item in report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов: {len(report)}, компиляция {_ms(compiled)} мс, '
+            f'кэширующий загрузчик: {"да" if cached else "нет"}'
+        ))
@@ -0,0 +1,178 @@
+"""Метрики запросов в памяти процесса и их вывод в формате Prometheus.
+
+Во время запроса замеры копятся в ``RequestStats`` текущего потока:
+SQL-запросы считает обёртка соединения, время шаблонов — бэкенд
+``core.templates``, попадания в кэш — бэкенды из ``core.cache.backends``.
+После ответа ``InstrumentationMiddleware`` сводит их в реестр по имени
+представления. Реестр у каждого процесса свой.
+"""
+import threading
+import time
+from collections import defaultdict
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Замеры одного запроса."""
+
+    def __init__(self, sql_limit=0):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sql = []
+        self.sql_limit = sql_limit
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для ``connection.execute_wrapper``."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if len(self.sql) < self.sql_limit:
+                self.sql.append((sql, duration))
+
+
+def current():
+    """Замеры запроса, обрабатываемого в этом потоке, или None."""
+    return getattr(_local, 'stats', None)
+
+
+def start(sql_limit=0):
+    _local.stats = RequestStats(sql_limit)
+    return _local.stats
+
+
+def finish():
+    _local.stats = None
+
+
+def record_template(duration):
+    stats = current()
+    if stats is not None:
+        stats.template_time += duration
+
+
+def record_cache(hits, misses):
+    stats = current()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else value
+
+
+class Registry:
+    """Счётчики и гистограмма длительности по представлениям."""
+
+    COUNTERS = (
+        ('db_queries_total', 'Число SQL-запросов.'),
+        ('db_duration_seconds_total', 'Время выполнения SQL-запросов.'),
+        ('template_render_seconds_total', 'Время рендеринга шаблонов.'),
+        ('cache_hits_total', 'Попадания в кэш.'),
+        ('cache_misses_total', 'Промахи кэша.'),
+        ('response_bytes_total', 'Размер тел ответов.'),
+        ('slow_requests_total', 'Медленные запросы.'),
+    )
+
+    def __init__(self, prefix='yatube'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.counters = defaultdict(float)
+            self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+            self.durations = defaultdict(float)
+            self.observations = defaultdict(int)
+
+    def observe(self, view, method, status, duration, stats, size, slow):
+        values = {
+            'db_queries_total': stats.queries,
+            'db_duration_seconds_total': stats.db_time,
+            'template_render_seconds_total': stats.template_time,
+            'cache_hits_total': stats.cache_hits,
+            'cache_misses_total': stats.cache_misses,
+            'response_bytes_total': size,
+            'slow_requests_total': int(slow),
+        }
+        with self._lock:
+            self.requests[view, method, str(status)] += 1
+            for name, value in values.items():
+                self.counters[name, view] += value
+            buckets = self.buckets[view]
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            self.durations[view] += duration
+            self.observations[view] += 1
+
+    def add(self, name, view, value):
+        """Добавляет к счётчику представления значение, известное только
+        после ответа (например, размер потокового тела)."""
+        with self._lock:
+            self.counters[name, view] += value
+
+    @staticmethod
+    def _labels(**labels):
+        return ','.join(
+            '{}="{}"'.format(
+                name,
+                str(value).replace('\\', '\\\\').replace('"', '\\"')
+            )
+            for name, value in labels.items()
+        )
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        name = f'{self.prefix}_requests_total'
+        lines = [
+            f'# HELP {name} Обработанные запросы.',
+            f'# TYPE {name} counter',
+        ]
+        with self._lock:
+            for (view, method, status), value in sorted(self.requests.items()):
+                labels = self._labels(view=view, method=method, status=status)
+                lines.append(f'{name}{{{labels}}} {value}')
+
+            name = f'{self.prefix}_request_duration_seconds'
+            lines += [
+                f'# HELP {name} Длительность обработки запроса.',
+                f'# TYPE {name} histogram',
+            ]
+            for view, buckets in sorted(self.buckets.items()):
+                for bound, value in zip(BUCKETS, buckets):
+                    labels = self._labels(view=view, le=bound)
+                    lines.append(f'{name}_bucket{{{labels}}} {value}')
+                total = self.observations[view]
+                labels = self._labels(view=view, le='+Inf')
+                lines.append(f'{name}_bucket{{{labels}}} {total}')
+                labels = self._labels(view=view)
+                lines.append(f'{name}_sum{{{labels}}} {self.durations[view]}')
+                lines.append(f'{name}_count{{{labels}}} {total}')
+
+            for counter, help_text in self.COUNTERS:
+                name = f'{self.prefix}_{counter}'
+                lines += [
+                    f'# HELP {name} {help_text}',
+                    f'# TYPE {name} counter',
+                ]
+                for (key, view), value in sorted(self.counters.items()):
+                    if key == counter:
+                        labels = self._labels(view=view)
+                        lines.append(f'{name}{{{labels}}} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,163 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics
+
+logger = logging.getLogger('core.metrics')
+
+
+class InstrumentationMiddleware:
+    """Замеряет каждый запрос и складывает замеры в ``metrics.registry``.
+
+    Считаются время ответа, число и время SQL-запросов, время рендеринга
+    шаблонов, попадания в кэш и размер ответа. Замеры отдаются клиенту
+    в заголовке Server-Timing, а медленные запросы вместе с их SQL
+    выборочно пишутся в лог ``core.metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start(settings.METRICS_SLOW_SQL_LIMIT)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        if not response.streaming:
+            size = len(response.content)
+        elif response.has_header('Content-Length'):
+            size = int(response['Content-Length'])
+        else:
+            size = 0
+            response.streaming_content = self.count_bytes(
+                response.streaming_content, view
+            )
+        slow = duration >= settings.METRICS_SLOW_REQUEST_SECONDS
+        metrics.registry.observe(
+            view, request.method, response.status_code, duration, stats,
+            size, slow
+        )
+        if slow and random.random() < settings.METRICS_SLOW_SAMPLE_RATE:
+            self.log_slow(request, view, duration, stats)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(duration, stats)
+        return response
+
+    @staticmethod
+    def count_bytes(chunks, view):
+        """Пропускает поток тела, добавляя его размер в реестр, когда
+        поток отдан клиенту."""
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            metrics.registry.add('response_bytes_total', view, size)
+
+    @staticmethod
+    def server_timing(duration, stats):
+        return ', '.join((
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} SQL"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="hit={stats.cache_hits} miss={stats.cache_misses}"',
+        ))
+
+    @staticmethod
+    def log_slow(request, view, duration, stats):
+        statements = '\n'.join(
+            f'  {seconds * 1000:.1f} мс  {sql}' for sql, seconds in stats.sql
+        )
+        logger.warning(
+            'Медленный запрос %s %s (%s): %.1f мс, SQL: %d за %.1f мс, '
+            'шаблоны: %.1f мс\n%s',
+            request.method, request.get_full_path(), view, duration * 1000,
+            stats.queries, stats.db_time * 1000, stats.template_time * 1000,
+            statements,
+        )
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli по ``Accept-Encoding``.
+
+    Сжимаются только типы из ``COMPRESSION_CONTENT_TYPES`` и тела не
+    короче ``COMPRESSION_MIN_SIZE``. Потоковые ответы сжимаются по частям
+    со сбросом после каждой, чтобы не задерживать начало страницы.
+    Ответ с атрибутом ``compressed_cache = (область кэша, ключ)`` берёт
+    сжатое тело из кэша и кладёт его туда после первого сжатия: так
+    закэшированные страницы не сжимаются заново на каждый запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        level = settings.COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, level
+            )
+            del response['Content-Length']
+        else:
+            content = self.compressed(response, encoding, level)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def compressible(response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        return (
+            content_type.strip().lower()
+            in settings.COMPRESSION_CONTENT_TYPES
+            and not response.has_header('Content-Encoding')
+            and 'no-transform' not in response.get('Cache-Control', '')
+            and (response.streaming
+                 or len(response.content) >= settings.COMPRESSION_MIN_SIZE)
+        )
+
+    @staticmethod
+    def compressed(response, encoding, level):
+        cached = getattr(response, 'compressed_cache', None)
+        if cached is None:
+            return compression.compress(response.content, encoding, level)
+        namespace, key = cached
+        key = f'{key}:{encoding}'
+        content = namespace.get(key)
+        if content is None:
+            content = compression.compress(response.content, encoding, level)
+            namespace.set(key, content)
+        return content
@@ -0,0 +1,127 @@
+"""WSGI-обёртка, отдающая собранную статику без Django.
+
+Для развёртываний без отдельного веб-сервера: запросы под
+``STATIC_URL`` обслуживаются по таблице файлов ``STATIC_ROOT``,
+составленной один раз при старте, остальные передаются приложению.
+Клиенту отдаётся заранее сжатый вариант из ``core.staticfiles.storage``
+по ``Accept-Encoding``; файлы с хэшем в имени (из манифеста) получают
+``Cache-Control`` на год с ``immutable``.
+"""
+import json
+import mimetypes
+import os
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+from core.compression import SUFFIXES, negotiate
+
+BLOCK_SIZE = 64 * 1024
+TEXT_TYPES = ('application/javascript', 'application/json', 'image/svg+xml')
+
+
+def content_type(name):
+    guessed, _ = mimetypes.guess_type(name)
+    guessed = guessed or 'application/octet-stream'
+    if guessed.startswith('text/') or guessed in TEXT_TYPES:
+        guessed += '; charset=utf-8'
+    return guessed
+
+
+class StaticFile:
+    """Файл статики и его сжатые варианты: кодировка -> (путь, размер, ETag).
+
+    Кодировка ``None`` означает исходный файл.
+    """
+
+    def __init__(self, path, immutable):
+        self.content_type = content_type(path)
+        self.immutable = immutable
+        self.variants = {}
+        for encoding, suffix in [(None, ''), *SUFFIXES.items()]:
+            try:
+                stat = os.stat(path + suffix)
+            except FileNotFoundError:
+                continue
+            etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+            self.variants[encoding] = (path + suffix, stat.st_size, etag)
+
+    def select(self, accept_encoding):
+        """Лучший вариант для клиента: (кодировка, путь, размер, ETag)."""
+        encoding = negotiate(accept_encoding, [
+            encoding for encoding in SUFFIXES if encoding in self.variants
+        ])
+        return (encoding, *self.variants[encoding])
+
+
+def scan(root):
+    """Таблица ``имя -> StaticFile`` по каталогу собранной статики."""
+    hashed = set()
+    manifest = os.path.join(root, 'staticfiles.json')
+    if os.path.exists(manifest):
+        with open(manifest, encoding='utf-8') as file:
+            hashed = set(json.load(file).get('paths', {}).values())
+    suffixes = tuple(SUFFIXES.values())
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if filename.endswith(suffixes) and os.path.exists(
+                os.path.splitext(path)[0]
+            ):
+                continue
+            files[name] = StaticFile(path, name in hashed)
+    return files
+
+
+class StaticFilesApplication:
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = scan(root or settings.STATIC_ROOT)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return [b'']
+        static = self.files.get(path[len(self.prefix):])
+        if static is None:
+            start_response('404 Not Found', [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+            ])
+            return [b'Not Found']
+        return self.serve(static, environ, start_response)
+
+    def cache_control(self, static):
+        if static.immutable:
+            return f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+        return f'public, max-age={settings.STATIC_UNHASHED_MAX_AGE}'
+
+    def serve(self, static, environ, start_response):
+        encoding, path, size, etag = static.select(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        headers = [
+            ('Cache-Control', self.cache_control(static)),
+            ('ETag', etag),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return [b'']
+        headers += [
+            ('Content-Type', static.content_type),
+            ('Content-Length', str(size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return [b'']
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(path, 'rb'), BLOCK_SIZE)
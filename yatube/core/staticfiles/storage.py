@@ -0,0 +1,57 @@
+"""Хранилище статики: имена с хэшем содержимого и сжатые копии.
+
+``collectstatic`` записывает рядом с каждым файлом ``имя.<хэш>.css`` и
+заранее сжатые варианты ``.gz`` и, если установлен brotli, ``.br``.
+``core.staticfiles.handlers`` отдаёт их без сжатия на лету, а имена с
+хэшем — с заголовками кэширования на год.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from core.compression import SUFFIXES, compress, encodings
+
+
+def compressible(name, size):
+    _, extension = os.path.splitext(name)
+    return (
+        extension.lower() in settings.STATIC_COMPRESS_EXTENSIONS
+        and size >= settings.STATIC_COMPRESS_MIN_SIZE
+    )
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """``ManifestStaticFilesStorage``, дописывающее сжатые копии файлов.
+
+    Сжатая копия сохраняется, только если она заметно меньше исходного
+    файла: иначе отдавать её нет смысла.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for compressed in self.compress_file(name):
+                yield name, compressed, True
+
+    def compress_file(self, name):
+        """Записывает сжатые варианты файла и возвращает их имена."""
+        if not compressible(name, self.size(name)):
+            return []
+        with self.open(name) as original:
+            content = original.read()
+        written = []
+        for encoding in encodings():
+            data = compress(content, encoding)
+            if len(data) >= len(content) * 0.95:
+                continue
+            compressed = name + SUFFIXES[encoding]
+            if self.exists(compressed):
+                self.delete(compressed)
+            self._save(compressed, ContentFile(data))
+            written.append(compressed)
+        return written
@@ -0,0 +1,46 @@
+"""Потоковая отдача длинных страниц.
+
+Шаблон рендерится в представлении, но вместо содержимого блоков
+``{% slot 'имя' %}`` в нём остаются метки. Ответ отдаёт страницу до
+метки, затем части слота по мере их рендеринга, затем остаток, так что
+клиент получает шапку и основное содержимое раньше, чем отрендерен,
+например, длинный список комментариев.
+
+Шаблон рендерится до возврата ответа, а не при его отдаче: иначе
+ошибки шаблона проявлялись бы посреди ответа, а CSRF-cookie, которую
+выставляет ``{% csrf_token %}``, уже не попала бы в заголовки.
+"""
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+
+MARKER = '<!--slot:{}-->'
+SLOTS_VARIABLE = 'stream_slots'
+
+
+def marker(name):
+    return MARKER.format(name)
+
+
+def stream_template(request, template_name, context, slots):
+    """``StreamingHttpResponse`` по шаблону со слотами.
+
+    ``slots`` — упорядоченный как в шаблоне словарь: имя слота ->
+    итерируемое строк, которыми слот заполняется при отдаче.
+    """
+    html = render_to_string(
+        template_name, {**context, SLOTS_VARIABLE: set(slots)}, request
+    )
+
+    def chunks():
+        rest = html
+        for name, parts in slots.items():
+            before, found, after = rest.partition(marker(name))
+            if not found:
+                continue
+            yield before.encode()
+            for part in parts:
+                yield part.encode()
+            rest = after
+        yield rest.encode()
+
+    return StreamingHttpResponse(chunks())
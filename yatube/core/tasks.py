@@ -0,0 +1,95 @@
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как задачу очереди под именем ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, *args, countdown=0):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Представления, меняющие данные, выполняются в ``transaction.atomic``:
+    строка очереди фиксируется вместе с основной записью, и воркер не
+    увидит задачу для отменённого изменения. При ``TASKS_EAGER`` задача
+    не пишется в очередь, а выполняется после фиксации транзакции, как
+    её выполнил бы воркер.
+    """
+    if name not in _registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if settings.TASKS_EAGER:
+        transaction.on_commit(partial(_registry[name], *args))
+        return None
+    return Task.objects.create(
+        name=name,
+        args=json.dumps(args),
+        run_at=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def claim(limit):
+    """Забирает до ``limit`` готовых задач одним UPDATE.
+
+    Задачи, зависшие в работе дольше ``TASKS_LOCK_TIMEOUT`` (например,
+    после падения воркера), забираются повторно.
+    """
+    now = timezone.now()
+    ready = Q(status=Task.PENDING, run_at__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT),
+    )
+    worker = uuid.uuid4().hex
+    Task.objects.filter(
+        ready,
+        pk__in=list(
+            Task.objects.filter(ready)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:limit]
+        ),
+    ).update(
+        status=Task.RUNNING,
+        worker=worker,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(worker=worker, status=Task.RUNNING))
+
+
+def execute(task):
+    """Выполняет взятую задачу: удачная удаляется из очереди, упавшая
+    откладывается с экспоненциальной задержкой или помечается ошибкой.
+    """
+    try:
+        _registry[task.name](*json.loads(task.args))
+    except Exception:
+        logger.exception('Задача %s #%s упала', task.name, task.pk)
+        failed = task.attempts >= settings.TASKS_MAX_ATTEMPTS
+        Task.objects.filter(pk=task.pk, worker=task.worker).update(
+            status=Task.FAILED if failed else Task.PENDING,
+            run_at=timezone.now() + timedelta(seconds=2 ** task.attempts),
+            worker='',
+            locked_at=None,
+            error=traceback.format_exc(),
+        )
+        return False
+    Task.objects.filter(pk=task.pk, worker=task.worker).delete()
+    return True
@@ -0,0 +1,130 @@
+"""Шаблонный бэкенд Django, замеряющий время рендеринга для core.metrics.
+
+Здесь же прогрев шаблонов: ``warm()`` компилирует все шаблоны проекта,
+и при кэширующем загрузчике (``settings_production``) первые запросы
+после старта процесса не тратят время на разбор шаблонов.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, engines
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.loaders.cached import Loader as CachedLoader
+
+from . import metrics
+
+
+class InstrumentedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.record_template(time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """``DjangoTemplates``, чьи шаблоны сообщают время рендеринга.
+
+    Вложенные ``{% include %}`` рендерятся движком напрямую и входят во
+    время внешнего шаблона без двойного учёта.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def _django_engines():
+    return [
+        backend for backend in engines.all()
+        if isinstance(backend, DjangoTemplates)
+    ]
+
+
+def is_cached(backend):
+    return any(
+        isinstance(loader, CachedLoader)
+        for loader in backend.engine.template_loaders
+    )
+
+
+def template_names(directories):
+    """Имена шаблонов в каталогах, относительно каталога, по алфавиту."""
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    ))
+    return sorted(names)
+
+
+def _render(template):
+    # Модели и RequestFactory импортируются здесь: модуль загружается
+    # из yatube.wsgi до инициализации приложений.
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    started = time.perf_counter()
+    template.render({}, request)
+    return time.perf_counter() - started
+
+
+def warm(names=None, render=False):
+    """Компилирует шаблоны и возвращает стоимость каждого.
+
+    По умолчанию берутся все шаблоны из ``DIRS`` движков. Для каждого
+    возвращается словарь с временем компиляции и, если ``render``,
+    рендеринга с пустым контекстом в секундах; ошибка шаблону, которому
+    нужен контекст, записывается в ``error`` и не прерывает прогрев.
+    """
+    report = []
+    for backend in _django_engines():
+        cached = is_cached(backend)
+        compiled = []
+        for name in names or template_names(backend.engine.dirs):
+            item = {'name': name, 'cached': cached, 'compile': None,
+                    'render': None, 'error': None}
+            report.append(item)
+            try:
+                started = time.perf_counter()
+                template = backend.get_template(name)
+                item['compile'] = time.perf_counter() - started
+            except Exception as error:
+                item['error'] = f'{type(error).__name__}: {error}'
+            else:
+                compiled.append((item, template))
+        # Рендеринг после компиляции всех шаблонов, чтобы {% extends %} и
+        # {% include %} не переносили компиляцию родителей в чужой замер.
+        for item, template in compiled if render else ():
+            try:
+                item['render'] = _render(template)
+            except Exception as error:
+                item['error'] = f'{type(error).__name__}: {error}'
+    return report
+
+
+def warm_on_startup():
+    """Прогрев при старте процесса, если включён в настройках."""
+    if settings.TEMPLATES_WARM_ON_STARTUP:
+        warm()
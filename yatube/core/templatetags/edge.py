@@ -0,0 +1,12 @@
+from django import template
+
+from core.edge import mark
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def edge(context, template_name):
+    """``{% include %}`` с метками для ``core.edge.render_fragments``."""
+    fragment = context.template.engine.get_template(template_name)
+    return mark(template_name, fragment.render(context))
@@ -0,0 +1,32 @@
+from django import template
+
+from core.streaming import SLOTS_VARIABLE, marker
+
+register = template.Library()
+
+
+class SlotNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        if name in context.get(SLOTS_VARIABLE, ()):
+            return marker(name)
+        return self.nodelist.render(context)
+
+
+@register.tag
+def slot(parser, token):
+    """``{% slot 'имя' %}...{% endslot %}``: содержимое, которое
+    ``core.streaming.stream_template`` отдаёт потоком; при обычном
+    рендеринге выводится как есть."""
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает один аргумент — имя слота'
+        )
+    nodelist = parser.parse(('endslot',))
+    parser.delete_first_token()
+    return SlotNode(parser.compile_filter(bits[1]), nodelist)
@@ -0,0 +1,106 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..asgi import WsgiToAsgi
+from ..benchmark import run_asgi, run_wsgi
+
+
+def echo(environ, start_response):
+    """WSGI-приложение, возвращающее тело и часть environ."""
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('Content-Type', 'text/plain'),
+                                   ('X-Path', environ['PATH_INFO'])])
+    return [
+        body, b'|', environ['QUERY_STRING'].encode(), b'|',
+        environ.get('HTTP_X_TOKEN', '').encode(),
+    ]
+
+
+def call(application, scope, messages):
+    sent = []
+    messages = list(reversed(messages))
+
+    async def receive():
+        return messages.pop()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def http(path, **scope):
+    return {
+        'type': 'http', 'method': 'POST', 'path': path,
+        'query_string': b'a=1', 'headers': [(b'x-token', b'secret')],
+        **scope,
+    }
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+    def test_request_and_response(self):
+        """Тело приходит частями, ответ уходит статусом и заголовками."""
+        sent = call(WsgiToAsgi(echo), http('/путь/'), [
+            {'type': 'http.request', 'body': b'hel', 'more_body': True},
+            {'type': 'http.request', 'body': b'lo'},
+        ])
+        start = sent[0]
+        self.assertEqual(start['status'], 201)
+        self.assertIn((b'x-path', '/путь/'.encode()), start['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(body, b'hello|a=1|secret')
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_disconnect_before_body(self):
+        sent = call(WsgiToAsgi(echo), http('/'), [
+            {'type': 'http.disconnect'},
+        ])
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        sent = call(WsgiToAsgi(echo), {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    def test_django_application(self):
+        application = WsgiToAsgi(get_wsgi_application())
+        sent = call(
+            application,
+            http(reverse('about:tech'), method='GET', query_string=b'',
+                 headers=[(b'host', b'testserver')]),
+            [{'type': 'http.request', 'body': b''}],
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertIn(b'</html>', body)
+
+
+class ServerBenchmarkTests(SimpleTestCase):
+    def test_throughput_under_concurrency(self):
+        def ok(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        for run, application in ((run_wsgi, ok), (run_asgi, WsgiToAsgi(ok))):
+            with self.subTest(run=run.__name__):
+                result = run(application, '/?page=2', 20, 4)
+                self.assertEqual(result['requests'], 20)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertGreater(result['rps'], 0)
+
+    def test_errors_reported(self):
+        def missing(environ, start_response):
+            start_response('404 Not Found', [])
+            return [b'']
+
+        with self.assertRaises(RuntimeError):
+            run_wsgi(missing, '/', 2, 2)
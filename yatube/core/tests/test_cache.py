@@ -0,0 +1,187 @@
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import Namespace
+from ..cache.backends.redis import RedisCache
+from ..cache.backends.sqlite import SQLiteCache
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Минимальный сервер Redis: только команды, которые шлёт бэкенд."""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, str):
+            self.wfile.write(b'+%s\r\n' % value.encode())
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self.reply(item)
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].decode().upper()
+            self.reply(getattr(self.server, command)(*args[1:]))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeRedisHandler)
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def GET(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def MGET(self, *keys):
+        return [self.GET(key) for key in keys]
+
+    def SET(self, key, value, *options):
+        options = [option.decode().upper() for option in options]
+        if 'NX' in options and self._alive(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if 'PX' in options:
+            ttl = int(options[options.index('PX') + 1])
+            self.expires[key] = time.time() + ttl / 1000
+        return 'OK'
+
+    def DEL(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def EXISTS(self, key):
+        return int(self._alive(key))
+
+    def INCRBY(self, key, delta):
+        value = int(self.GET(key) or 0) + int(delta)
+        self.data[key] = str(value).encode()
+        return value
+
+    def PEXPIRE(self, key, ttl):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + int(ttl) / 1000
+        return 1
+
+    def PERSIST(self, key):
+        return int(self.expires.pop(key, None) is not None)
+
+    def FLUSHDB(self):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
+
+
+class CacheBackendMixin:
+    """Общие проверки для бэкендов кэша."""
+
+    def test_set_get_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': 'два'})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 'два'}
+        )
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expiry(self):
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('forever', 'value', None)
+        time.sleep(0.1)
+        self.assertFalse(self.cache.has_key('short'))
+        self.assertTrue(self.cache.has_key('forever'))
+
+    def test_shared_between_instances(self):
+        """Запись одного клиента видна другому, как воркерам gunicorn."""
+        self.cache.set('shared', 'value')
+        self.assertEqual(self.other_cache.get('shared'), 'value')
+        self.other_cache.clear()
+        self.assertIsNone(self.cache.get('shared'))
+
+
+class SQLiteCacheTests(CacheBackendMixin, SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(path, {})
+        self.other_cache = SQLiteCache(path, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class RedisCacheTests(CacheBackendMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeRedisServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.location = 'redis://127.0.0.1:%d/0' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache = RedisCache(self.location, {})
+        self.other_cache = RedisCache(self.location, {})
+        self.cache.clear()
+
+
+@override_settings(CACHE_TTL={'feeds': 0.05})
+class NamespaceTests(SimpleTestCase):
+    def test_namespace_ttl_and_prefix(self):
+        """Ключи области получают префикс и время жизни из CACHE_TTL."""
+        feeds = Namespace('feeds')
+        feeds.set('page', 'html')
+        self.assertEqual(feeds.get('page'), 'html')
+        self.assertIsNone(Namespace('other').get('page'))
+        time.sleep(0.1)
+        self.assertIsNone(feeds.get('page'))
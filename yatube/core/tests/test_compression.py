@@ -0,0 +1,103 @@
+import gzip
+import zlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import compression
+from ..middleware import CompressionMiddleware
+
+HTML = '<p>Строка страницы</p>\n' * 200
+
+
+class CompressionTests(SimpleTestCase):
+    def test_negotiate(self):
+        self.assertEqual(
+            compression.negotiate('gzip, br', ['br', 'gzip']), 'br'
+        )
+        self.assertEqual(
+            compression.negotiate('br;q=0, gzip', ['br', 'gzip']), 'gzip'
+        )
+        self.assertIsNone(compression.negotiate('identity', ['gzip']))
+        self.assertIsNone(compression.negotiate('gzip', []))
+
+    def test_stream_flushes_every_chunk(self):
+        """Каждая часть сжатого потока распаковывается без следующих."""
+        chunks = [HTML.encode()] * 3
+        compressed = list(compression.compress_stream(chunks, 'gzip'))
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(compressed[0]), chunks[0])
+        self.assertEqual(gzip.decompress(b''.join(compressed)),
+                         b''.join(chunks))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def process(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_html(self):
+        response = HttpResponse(HTML)
+        response['ETag'] = '"v1"'
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+        self.assertEqual(response['Content-Length'],
+                         str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+    def test_skipped_responses(self):
+        """Малые тела, чужие типы и клиенты без gzip получают ответ
+        как есть."""
+        responses = {
+            'малое тело': (HttpResponse('<p>коротко</p>'), 'gzip'),
+            'картинка': (
+                HttpResponse(b'\0' * 4096, content_type='image/png'), 'gzip'
+            ),
+            'без gzip': (HttpResponse(HTML), 'identity'),
+            'no-transform': (HttpResponse(HTML), 'gzip'),
+        }
+        responses['no-transform'][0]['Cache-Control'] = 'no-transform'
+        for name, (response, accept_encoding) in responses.items():
+            with self.subTest(name=name):
+                response = self.process(response, accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            self.process(HttpResponse(HTML), 'identity')['Vary'],
+            'Accept-Encoding'
+        )
+
+    def test_streaming(self):
+        response = StreamingHttpResponse(iter([HTML.encode()] * 3))
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), HTML * 3)
+
+
+class CompressedPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_page_compressed_once(self):
+        """Закэшированная страница сжимается один раз на версию."""
+        url = reverse('about:tech')
+        with mock.patch.object(
+            compression, 'compress', wraps=compression.compress
+        ) as compress:
+            responses = [
+                self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                for _ in range(3)
+            ]
+        self.assertEqual(compress.call_count, 1)
+        for response in responses:
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            content = gzip.decompress(response.content).decode()
+            self.assertIn('</html>', content)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.test import SimpleTestCase
+
+from ..db.utils import temporary_database
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        self.stack = ExitStack()
+
+    def tearDown(self):
+        self.stack.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def database(self, alias='sqlite_test', **options):
+        return self.stack.enter_context(temporary_database(alias, {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': self.path,
+            'OPTIONS': options,
+        }))
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        connection = self.database(pragmas={
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'busy_timeout': 1234,
+            'cache_size': -2048,
+        })
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 1234)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -2048)
+        connection.close()
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 1234)
+
+    def test_immediate_transactions(self):
+        """atomic() сразу берёт блокировку на запись."""
+        connection = self.database(transaction_mode='IMMEDIATE')
+        other = self.database('sqlite_other', timeout=0)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER)')
+        with transaction.atomic(using=connection.alias):
+            with self.assertRaisesMessage(Exception, 'locked'):
+                with other.cursor() as cursor:
+                    cursor.execute('INSERT INTO item VALUES (1)')
+
+    def test_unknown_transaction_mode(self):
+        connection = self.database(transaction_mode='LAZY')
+        with self.assertRaises(ImproperlyConfigured):
+            connection.ensure_connection()
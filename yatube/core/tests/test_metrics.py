@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+from .. import metrics
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:post_list'))
+        timing = response['Server-Timing']
+        for metric in ('app;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            self.assertIn(metric, timing)
+        self.assertNotIn('desc="0 SQL"', timing)
+
+    def test_registry_per_view(self):
+        url = reverse('posts:post_list')
+        self.client.get(url)
+        self.client.get(url)
+        view = 'posts:post_list'
+        self.assertEqual(metrics.registry.requests[view, 'GET', '200'], 2)
+        self.assertEqual(metrics.registry.observations[view], 2)
+        counters = metrics.registry.counters
+        self.assertGreater(counters['db_queries_total', view], 0)
+        self.assertGreater(counters['template_render_seconds_total', view], 0)
+        self.assertGreater(counters['response_bytes_total', view], 0)
+        self.assertGreater(counters['cache_misses_total', view], 0)
+        self.assertGreater(counters['cache_hits_total', view], 0)
+
+    @override_settings(COMMENTS_STREAM_MIN=1)
+    def test_streaming_response_size(self):
+        """Размер потокового ответа учитывается, когда тело отдано."""
+        post = Post.objects.get()
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertTrue(response.streaming)
+        view = 'posts:post_detail'
+        counters = metrics.registry.counters
+        self.assertEqual(counters['response_bytes_total', view], 0)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(counters['response_bytes_total', view], len(body))
+
+    def test_cache_get_many_counted_once(self):
+        stats = metrics.start()
+        try:
+            cache.set('a', 1)
+            cache.get_many(['a', 'b'])
+        finally:
+            metrics.finish()
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 1))
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('posts:post_list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn(
+            'yatube_requests_total{view="posts:post_list",method="GET",'
+            'status="200"} 1',
+            body
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:post_list"} 1',
+            body
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:post_list"}', body)
+
+    def test_metrics_endpoint_allowed_ips(self):
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_SLOW_REQUEST_SECONDS=0)
+    def test_slow_request_logged_with_sql(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(reverse('posts:post_list'))
+        self.assertIn('posts:post_list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        self.assertEqual(
+            metrics.registry.counters['slow_requests_total',
+                                      'posts:post_list'],
+            1
+        )
+
+    @override_settings(
+        METRICS_SLOW_REQUEST_SECONDS=0, METRICS_SLOW_SAMPLE_RATE=0
+    )
+    def test_slow_request_sampling(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.metrics', 'WARNING'):
+                self.client.get(reverse('posts:post_list'))
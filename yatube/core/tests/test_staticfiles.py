@@ -0,0 +1,127 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ..benchmark import fetch_wsgi
+from ..compression import accepted_encodings
+from ..staticfiles.handlers import StaticFilesApplication
+
+CSS = b'body { color: red; }\n' * 100
+
+
+def application(environ, start_response):
+    start_response('200 OK', [])
+    return [b'django']
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        files = {
+            'css/site.css': CSS,
+            'css/small.css': b'a{}',
+            'img/logo.png': os.urandom(2048),
+        }
+        for name, content in files.items():
+            path = os.path.join(cls.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(content)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.storage.'
+                'CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.url('css/site.css')
+        cls.app = StaticFilesApplication(application)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def request(self, path, method='GET', **headers):
+        sent = []
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method, **headers}
+        body = b''.join(
+            self.app(environ, lambda status, items: sent.append(
+                (status, dict(items))
+            ))
+        )
+        status, items = sent[0]
+        return int(status.split()[0]), items, body
+
+    def test_collect_hashes_and_compresses(self):
+        """Текстовые файлы получают сжатые копии, мелкие и PNG — нет."""
+        self.assertRegex(self.hashed, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        hashed = os.path.join(self.root, self.hashed[len('/static/'):])
+        with gzip.open(hashed + '.gz') as file:
+            self.assertEqual(file.read(), CSS)
+        for name in ('css/site.css.gz', 'css/site.css'):
+            self.assertTrue(os.path.exists(os.path.join(self.root, name)))
+        for name in ('css/small.css.gz', 'img/logo.png.gz'):
+            self.assertFalse(os.path.exists(os.path.join(self.root, name)))
+
+    def test_serves_precompressed_variant(self):
+        status, headers, body = self.request(
+            self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(headers['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        status, headers, body = self.request(
+            self.hashed, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, CSS)
+        _, headers, _ = self.request(
+            '/static/img/logo.png', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['Content-Type'], 'image/png')
+
+    def test_cache_headers(self):
+        """Файлы с хэшем кэшируются на год, остальные ненадолго."""
+        _, headers, _ = self.request(self.hashed)
+        self.assertEqual(
+            headers['Cache-Control'],
+            'public, max-age=31536000, immutable'
+        )
+        status, _, body = self.request(
+            self.hashed, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual((status, body), (304, b''))
+        _, headers, _ = self.request('/static/css/site.css')
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=60')
+
+    def test_other_requests(self):
+        self.assertEqual(self.request('/static/missing.css')[0], 404)
+        self.assertEqual(self.request(self.hashed, method='POST')[0], 405)
+        self.assertEqual(self.request(self.hashed, method='HEAD')[2], b'')
+        self.assertEqual(
+            fetch_wsgi(self.app, '/posts/1/'), (200, b'django')
+        )
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0, BR;q=0.5, identity'),
+            {'br', 'identity'}
+        )
@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ..models import Task
+from ..tasks import claim, enqueue, task
+from .utils import OnCommitMixin
+
+calls = []
+
+
+@task('core.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('core.tests.fail')
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTests(OnCommitMixin, TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_tasks(self):
+        call_command('run_tasks', once=True, workers=1, stdout=StringIO())
+
+    def test_enqueue_stores_task_until_worker_runs(self):
+        """Задача ждёт в базе и удаляется после выполнения воркером."""
+        enqueue('core.tests.record', 'значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+        self.run_tasks()
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claimed_task_is_not_claimed_twice(self):
+        enqueue('core.tests.record', 1)
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Упавшая задача откладывается, а после лимита попыток
+        остаётся в очереди со статусом ошибки."""
+        enqueue('core.tests.fail')
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_tasks()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertIn('RuntimeError', failed.error)
+        Task.objects.update(run_at=failed.created)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_tasks()
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        """Немедленный режим выполняет задачу без очереди, но только
+        после фиксации транзакции."""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('core.tests.record', 2)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [2])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_skips_rolled_back_task(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    enqueue('core.tests.record', 3)
+                    raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(calls, [])
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('core.tests.missing')
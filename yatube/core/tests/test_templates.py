@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templates import template_names, warm, warm_on_startup
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+
+def cached_names():
+    loader = engines.all()[0].engine.template_loaders[0]
+    return set(loader.get_template_cache)
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class WarmTemplatesTests(SimpleTestCase):
+    def test_warm_fills_cached_loader(self):
+        names = template_names([settings.TEMPLATES_DIR])
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/header.html', names)
+        report = warm()
+        self.assertEqual([item['name'] for item in report], names)
+        self.assertTrue(all(item['cached'] for item in report))
+        self.assertTrue(all(item['compile'] is not None for item in report))
+        self.assertTrue(all(item['render'] is None for item in report))
+        self.assertLessEqual(set(names), cached_names())
+
+    def test_render_errors_reported(self):
+        """Ошибка шаблона без нужного контекста не прерывает прогрев."""
+        names = ['posts/profile.html', 'about/tech.html', 'missing.html']
+        report = warm(names, render=True)
+        profile, tech, missing = report
+        self.assertIn('NoReverseMatch', profile['error'])
+        self.assertIsNotNone(profile['compile'])
+        self.assertIsNone(tech['error'])
+        self.assertIsNotNone(tech['render'])
+        self.assertIn('TemplateDoesNotExist', missing['error'])
+        self.assertIsNone(missing['compile'])
+
+    @override_settings(TEMPLATES_WARM_ON_STARTUP=True)
+    def test_warm_on_startup(self):
+        warm_on_startup()
+        self.assertIn('posts/post_detail.html', cached_names())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('warm_templates', 'about/tech.html', stdout=out)
+        output = out.getvalue()
+        self.assertIn('about/tech.html', output)
+        self.assertIn('Шаблонов: 1', output)
+        self.assertIn('кэширующий загрузчик: да', output)
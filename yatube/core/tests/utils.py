@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class OnCommitMixin:
+    """Перехват ``transaction.on_commit`` внутри ``TestCase``.
+
+    ``TestCase`` не фиксирует транзакцию, поэтому задачи немедленного
+    режима сами не выполняются. Повторяет ``captureOnCommitCallbacks``
+    из Django 3.2.
+    """
+
+    @classmethod
+    @contextmanager
+    def captureOnCommitCallbacks(cls, *, using=DEFAULT_DB_ALIAS,
+                                 execute=False):
+        callbacks = []
+        start = len(connections[using].run_on_commit)
+        try:
+            yield callbacks
+        finally:
+            # Колбэк может поставить новые, их тоже нужно выполнить.
+            while True:
+                count = len(connections[using].run_on_commit)
+                for _, callback in connections[using].run_on_commit[start:]:
+                    callbacks.append(callback)
+                    if execute:
+                        callback()
+                if count == len(connections[using].run_on_commit):
+                    break
+                start = count
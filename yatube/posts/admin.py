@@ -1,11 +1,36 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 
+from . import search
 from .models import Comment, Group, Post
 
 
-class CommentAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE.
+
+    Индекс отдаёт не больше ``settings.SEARCH_MAX_RESULTS`` совпадений;
+    если их больше, список неполный, о чём админка предупреждает.
+    """
+
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        found = search.search_objects(self.search_kind, search_term)
+        if len(found) >= settings.SEARCH_MAX_RESULTS:
+            messages.warning(
+                request,
+                f'Показаны только {settings.SEARCH_MAX_RESULTS} самых '
+                'релевантных совпадений, уточните запрос.'
+            )
+        return queryset.filter(pk__in=found), False
+
+
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('post', 'author', 'text', 'created')
     search_fields = ('text',)
+    search_kind = search.COMMENT
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
@@ -14,7 +39,7 @@ class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -25,6 +50,7 @@ class PostAdmin(admin.ModelAdmin):
 
     list_editable = ('group',)
     search_fields = ('text',)
+    search_kind = search.POST
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
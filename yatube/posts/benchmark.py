@@ -0,0 +1,246 @@
+"""Синтетические данные и сценарии для ``manage.py benchmark``.
+
+Активность распределена по степенному закону: немногие авторы пишут
+большую часть постов и собирают большую часть подписчиков, немногие
+посты собирают большую часть комментариев.
+"""
+import random
+from datetime import timedelta
+from itertools import count, cycle
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from . import search, timeline
+from .counters import recount
+from .models import Comment, Follow, Group, Post, User
+from .transfer import set_dates
+
+SCALES = {
+    'tiny': {
+        'users': 20, 'groups': 3, 'posts': 200, 'comments': 400,
+        'follows': 60,
+    },
+    'small': {
+        'users': 200, 'groups': 10, 'posts': 5000, 'comments': 10000,
+        'follows': 2000,
+    },
+    'medium': {
+        'users': 2000, 'groups': 50, 'posts': 50000, 'comments': 100000,
+        'follows': 20000,
+    },
+}
+
+
+def power_law(size, alpha=1.1):
+    """Веса рангов 1..size по закону Ципфа."""
+    return [1 / rank ** alpha for rank in range(1, size + 1)]
+
+
+def seed(users, groups, posts, comments, follows, random_seed=0):
+    """Создаёт набор данных и обновляет производные таблицы."""
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+
+    mixer.cycle(users).blend(User, username=mixer.sequence('bench{0}'))
+    mixer.cycle(groups).blend(
+        Group,
+        title=mixer.sequence('Группа {0}'),
+        slug=mixer.sequence('bench-group-{0}'),
+    )
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    author_weights = power_law(len(user_ids))
+    now = timezone.now()
+
+    Post.objects.bulk_create(
+        (
+            Post(
+                author_id=rng.choices(user_ids, author_weights)[0],
+                group_id=rng.choice(group_ids + [None]),
+                text=fake.text(max_nb_chars=300),
+            )
+            for _ in range(posts)
+        ),
+    )
+    post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+    set_dates(Post, 'pub_date', [
+        (pk, now - timedelta(minutes=number))
+        for number, pk in enumerate(post_ids)
+    ])
+    post_weights = power_law(len(post_ids))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=rng.choices(post_ids, post_weights)[0],
+                author_id=rng.choice(user_ids),
+                text=fake.sentence(),
+            )
+            for _ in range(comments)
+        ),
+    )
+    set_dates(Comment, 'created', [
+        (pk, now - timedelta(seconds=number))
+        for number, pk in enumerate(
+            Comment.objects.order_by('pk').values_list('pk', flat=True)
+        )
+    ])
+
+    pairs = set()
+    for _ in range(follows):
+        user_id = rng.choice(user_ids)
+        author_id = rng.choices(user_ids, author_weights)[0]
+        if user_id != author_id:
+            pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user, author_id=author) for user, author in pairs],
+        ignore_conflicts=True,
+    )
+
+    recount()
+    for follow in Follow.objects.iterator():
+        timeline.backfill(follow)
+    search.rebuild()
+
+
+def _check(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(
+            f'{response.request["PATH_INFO"]}: {response.status_code}'
+        )
+    return response
+
+
+def _targets():
+    """Самые нагруженные объекты набора данных."""
+    follower = User.objects.annotate(
+        follows=Count('follower')
+    ).order_by('-follows').first()
+    return {
+        'author': User.objects.order_by('-stats__posts_count').first(),
+        'follower': follower,
+        'reader': User.objects.exclude(pk=follower.pk).order_by(
+            'stats__followers_count'
+        ).first(),
+        'group': Group.objects.order_by('pk').first(),
+        'post': Post.objects.order_by('-comments_count').first(),
+    }
+
+
+def read_paths():
+    """Страницы чтения для сравнения WSGI и ASGI: имя -> (путь, cookie).
+
+    Лента подписок запрашивается с cookie сессии подписчика.
+    """
+    targets = _targets()
+    client = Client()
+    client.force_login(targets['follower'])
+    session = f'{settings.SESSION_COOKIE_NAME}=' + (
+        client.cookies[settings.SESSION_COOKIE_NAME].value
+    )
+    return {
+        'index': (reverse('posts:post_list'), ''),
+        'group_posts': (
+            reverse('posts:group_list', args=[targets['group'].slug]), ''
+        ),
+        'profile': (
+            reverse('posts:profile', args=[targets['author'].username]), ''
+        ),
+        'post_detail': (
+            reverse('posts:post_detail', args=[targets['post'].pk]), ''
+        ),
+        'follow_index': (reverse('posts:follow_index'), session),
+    }
+
+
+def scenarios():
+    """Сценарии для самых нагруженных объектов набора данных."""
+    targets = _targets()
+    author, follower, reader, group, post = (
+        targets[name]
+        for name in ('author', 'follower', 'reader', 'group', 'post')
+    )
+
+    anonymous = Client()
+    client = Client()
+    client.force_login(follower)
+    deep_page = max(Post.objects.count() // 10 // 2, 1)
+    numbers = count()
+    follow_urls = cycle([
+        reverse('posts:profile_follow', args=[reader.username]),
+        reverse('posts:profile_unfollow', args=[reader.username]),
+    ])
+
+    def get(client, url):
+        return lambda: _check(client.get(url), 200)
+
+    return {
+        'index': get(anonymous, reverse('posts:post_list')),
+        'index_deep_page': get(
+            anonymous, f'{reverse("posts:post_list")}?page={deep_page}'
+        ),
+        'group_posts': get(
+            anonymous, reverse('posts:group_list', args=[group.slug])
+        ),
+        'profile': get(
+            anonymous, reverse('posts:profile', args=[author.username])
+        ),
+        'post_detail': get(
+            anonymous, reverse('posts:post_detail', args=[post.pk])
+        ),
+        'feed_atom': get(anonymous, reverse('posts:feed', args=['atom'])),
+        'profile_feed_json': get(
+            anonymous,
+            reverse('posts:profile_feed', args=[author.username, 'json'])
+        ),
+        'follow_index': get(client, reverse('posts:follow_index')),
+        'post_create': lambda: _check(client.post(
+            reverse('posts:post_create'),
+            {'text': f'Пост нагрузочного теста {next(numbers)}'},
+        ), 302),
+        'add_comment': lambda: _check(client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий нагрузочного теста'},
+        ), 302),
+        'profile_follow': lambda: _check(
+            client.get(next(follow_urls)), 302
+        ),
+    }
+
+
+def db_workload(alias):
+    """Чтение ленты и запись комментариев напрямую в базу ``alias``.
+
+    Запись повторяет ``add_comment`` без сигналов и очереди задач:
+    вставка комментария и пересчёт счётчика в одной транзакции.
+    """
+    posts = Post.objects.using(alias)
+    user_id = User.objects.using(alias).values_list('pk', flat=True).first()
+    post_ids = list(posts.values_list('pk', flat=True)[:100])
+    if user_id is None or not post_ids:
+        raise RuntimeError(f'В базе {alias} нет пользователей и постов')
+    rng = random.Random(0)
+
+    def read():
+        list(posts.for_feed().order_by('-pub_date')[:settings.POSTS_PAGE])
+
+    def write():
+        post_id = rng.choice(post_ids)
+        with transaction.atomic(using=alias):
+            Comment.objects.using(alias).bulk_create([Comment(
+                post_id=post_id,
+                author_id=user_id,
+                text='Комментарий нагрузочного теста',
+            )])
+            posts.filter(pk=post_id).update(
+                comments_count=F('comments_count') + 1
+            )
+
+    return read, write
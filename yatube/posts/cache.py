@@ -0,0 +1,189 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core import edge
+from core.cache import feeds, pages
+
+VERSION_KEY = 'version:{}'
+
+
+def get_versions(*scopes):
+    """Версии областей кэша (метки времени последнего изменения).
+
+    Отсутствующая в кэше версия создаётся заново, что равносильно
+    сбросу всех фрагментов этой области.
+    """
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = feeds.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        feeds.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Инвалидирует фрагменты, зависящие от переданных областей."""
+    now = time.time()
+    feeds.set_many({VERSION_KEY.format(scope): now for scope in scopes}, None)
+
+
+def post_scopes(post, group_id=None):
+    """Области кэша, которые затрагивает изменение поста."""
+    scopes = ['feed', f'author:{post.author_id}', f'post:{post.pk}']
+    for group in {post.group_id, group_id} - {None}:
+        scopes.append(f'group:{group}')
+    return scopes
+
+
+def feed_cache_context(request, *scopes):
+    """Ключ фрагмента ленты: страница, курсор и версии областей."""
+    parts = [request.GET.get('page', ''), request.GET.get('cursor', '')]
+    parts.extend(str(version) for version in get_versions(*scopes))
+    return {
+        'feed_cache_key': ':'.join(parts),
+        'feed_cache_timeout': feeds.timeout,
+    }
+
+
+def page_versions(request, scopes):
+    """Версии областей, один раз на запрос для ETag и Last-Modified."""
+    if not hasattr(request, '_page_versions'):
+        request._page_versions = get_versions(*scopes)
+    return request._page_versions
+
+
+def conditional_page(page_scopes):
+    """Условный GET для страницы, собранной из областей кэша.
+
+    ``page_scopes(request, *args, **kwargs)`` возвращает области,
+    от которых зависит страница, или None, если объекта нет. Валидаторы
+    строятся из версий областей без запросов к ленте и рендеринга,
+    поэтому неизменившаяся страница отдаётся ответом 304.
+
+    Страница авторизованного пользователя содержит его шапку и CSRF-токен,
+    поэтому в ETag входят id пользователя и CSRF-cookie, а Last-Modified,
+    не различающий пользователей, отдаётся только анонимам.
+    """
+    def versions(request, *args, **kwargs):
+        scopes = page_scopes(request, *args, **kwargs)
+        if scopes is None:
+            return None
+        return page_versions(request, scopes)
+
+    def etag(request, *args, **kwargs):
+        page_versions = versions(request, *args, **kwargs)
+        if page_versions is None:
+            return None
+        parts = [
+            str(request.user.pk or ''),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            *(str(version) for version in page_versions),
+        ]
+        return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        page_versions = versions(request, *args, **kwargs)
+        if page_versions is None:
+            return None
+        return datetime.fromtimestamp(max(page_versions), timezone.utc)
+
+    def decorator(view):
+        return vary_on_cookie(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        )
+    return decorator
+
+
+def _page_key(request, versions):
+    parts = [request.get_host(), request.get_full_path()]
+    parts.extend(str(version) for version in versions)
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def _storable(request, response):
+    """Ответ, который можно отдавать всем анонимам."""
+    return (
+        not request.user.is_authenticated
+        and response.status_code == 200
+        and not response.cookies
+    )
+
+
+def _tee(chunks, key):
+    """Отдаёт части потокового ответа и кэширует тело целиком."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    pages.set(key, b''.join(parts))
+
+
+def _store(key, response):
+    """Сохраняет тело ответа; у TemplateResponse — после рендеринга,
+    у потокового — когда оно выдано целиком.
+
+    Сжатое ``CompressionMiddleware`` тело кладётся рядом с ним, поэтому
+    попадания в кэш отдаются без повторного сжатия.
+    """
+    if response.streaming:
+        response.streaming_content = _tee(response.streaming_content, key)
+        return
+    response.compressed_cache = (pages, key)
+    if getattr(response, 'is_rendered', True):
+        pages.set(key, response.content)
+    else:
+        response.add_post_render_callback(
+            lambda rendered: pages.set(key, rendered.content)
+        )
+
+
+def cached_page(page_scopes, shared=False):
+    """Полностраничный кэш анонимной версии страницы.
+
+    Ключ — адрес страницы и версии областей из ``page_scopes`` (как у
+    ``conditional_page``), так что изменения контента сразу дают новый
+    ключ. Тело сохраняется только из ответов анонимам, потоковые —
+    после отдачи последней части. При ``shared``
+    его получают и вошедшие пользователи: фрагменты ``{% edge %}``
+    (шапка, переключатель лент) перерисовываются для них через
+    ``core.edge``. Страницы с другим персональным содержимым (форма
+    комментария, кнопка подписки) объявляются без ``shared``, и
+    пользователи получают их из представления.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            authenticated = request.user.is_authenticated
+            if request.method not in ('GET', 'HEAD') or (
+                authenticated and not shared
+            ):
+                return view(request, *args, **kwargs)
+            scopes = page_scopes(request, *args, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            key = _page_key(request, page_versions(request, scopes))
+            content = pages.get(key)
+            if content is not None:
+                if authenticated:
+                    return HttpResponse(
+                        edge.render_fragments(request, content)
+                    )
+                response = HttpResponse(content)
+                response.compressed_cache = (pages, key)
+                return response
+            response = view(request, *args, **kwargs)
+            if _storable(request, response):
+                _store(key, response)
+            return response
+        return wrapper
+    return decorator
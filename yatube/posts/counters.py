@@ -0,0 +1,59 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с количеством строк queryset для внешней строки."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recount_users(pks=None):
+    """Пересчитывает счётчики пользователей с этими pk или всех."""
+    missing = User.objects.filter(stats__isnull=True)
+    stats = UserStats.objects.all()
+    if pks is not None:
+        missing = missing.filter(pk__in=pks)
+        stats = stats.filter(pk__in=pks)
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=user_id)
+            for user_id in missing.values_list('pk', flat=True)
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    return stats.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+    )
+
+
+def recount_posts(pks=None):
+    """Пересчитывает число комментариев постов с этими pk или всех."""
+    posts = Post.objects.all()
+    if pks is not None:
+        posts = posts.filter(pk__in=pks)
+    return posts.update(
+        comments_count=_count(Comment.objects.all(), 'post'),
+    )
+
+
+def recount():
+    """Пересчитывает все денормализованные счётчики тремя UPDATE.
+
+    Сигналы меняют счётчики на ±1 в транзакции основной записи; полный
+    пересчёт нужен только для исправления расхождений после массовых
+    операций в обход сигналов.
+    """
+    return recount_users(), recount_posts()
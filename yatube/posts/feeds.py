@@ -0,0 +1,121 @@
+"""Ленты Atom и JSON Feed для общей ленты, групп и авторов.
+
+Посты выбираются одним запросом ``values()`` без создания моделей,
+готовая лента кэшируется целиком под версией своей области кэша и
+сбрасывается вместе с HTML-лентами при изменении постов.
+"""
+import json
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from core.cache import syndication
+
+FORMATS = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+FIELDS = (
+    'pk', 'text', 'pub_date', 'author__username', 'author__first_name',
+    'author__last_name', 'group__title',
+)
+
+
+def items(posts):
+    """Последние посты ленты в виде словарей."""
+    return posts.order_by('-pub_date', '-pk').values(*FIELDS)[
+        :settings.FEED_ITEMS
+    ]
+
+
+def _entry(request, post):
+    name = ' '.join(
+        part for part in (post['author__first_name'],
+                          post['author__last_name']) if part
+    )
+    return {
+        'id': str(post['pk']),
+        'url': request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post['pk']])
+        ),
+        'title': Truncator(post['text']).words(10),
+        'text': post['text'],
+        'date': post['pub_date'],
+        'author': name or post['author__username'],
+        'author_url': request.build_absolute_uri(
+            reverse('posts:profile', args=[post['author__username']])
+        ),
+        'tags': [post['group__title']] if post['group__title'] else [],
+    }
+
+
+def render_atom(request, title, link, entries):
+    feed = Atom1Feed(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description='',
+        language='ru',
+        feed_url=request.build_absolute_uri(),
+    )
+    for entry in entries:
+        feed.add_item(
+            title=entry['title'],
+            link=entry['url'],
+            description=entry['text'],
+            unique_id=entry['url'],
+            pubdate=entry['date'],
+            author_name=entry['author'],
+            author_link=entry['author_url'],
+            categories=entry['tags'],
+        )
+    return feed.writeString('utf-8').encode()
+
+
+def render_json(request, title, link, entries):
+    feed = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': title,
+        'home_page_url': request.build_absolute_uri(link),
+        'feed_url': request.build_absolute_uri(),
+        'language': 'ru',
+        'items': [
+            {
+                'id': entry['url'],
+                'url': entry['url'],
+                'title': entry['title'],
+                'content_text': entry['text'],
+                'date_published': entry['date'].isoformat(),
+                'authors': [
+                    {'name': entry['author'], 'url': entry['author_url']}
+                ],
+                'tags': entry['tags'],
+            }
+            for entry in entries
+        ],
+    }
+    return json.dumps(feed, ensure_ascii=False).encode()
+
+
+RENDERERS = {'atom': render_atom, 'json': render_json}
+
+
+def render(request, fmt, title, link, posts, version):
+    """Лента в формате ``fmt`` из кэша или из одного запроса.
+
+    Ссылки в ленте абсолютные, поэтому ключ включает схему и хост:
+    лента, собранная по HTTP, не отдаётся клиенту HTTPS. Версия области
+    кэша в ключе даёт новую ленту сразу после нового поста.
+    """
+    key = (
+        f'{fmt}:{request.scheme}://{request.get_host()}{request.path}:'
+        f'{version}'
+    )
+    content = syndication.get(key)
+    if content is None:
+        entries = [_entry(request, post) for post in items(posts)]
+        content = RENDERERS[fmt](request, title, link, entries)
+        syndication.set(key, content)
+    return content
@@ -0,0 +1,290 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+
+from core.asgi import WsgiToAsgi
+from core.benchmark import (clone_sqlite, compare, format_mixed,
+                            format_servers, format_static, format_table,
+                            load_baseline, measure, page_assets, run_asgi,
+                            run_mixed, run_wsgi, save_baseline,
+                            static_transfer)
+from core.db.utils import temporary_database
+from core.staticfiles.handlers import StaticFilesApplication
+from posts.benchmark import SCALES, db_workload, read_paths, scenarios, seed
+
+# Настройки SQLite для --db-workload: стандартный бэкенд Django против
+# настроенного в settings.DATABASES.
+DB_PROFILES = {
+    'stock': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+    },
+    'tuned': {
+        'ENGINE': settings.DATABASES['default']['ENGINE'],
+        'CONN_MAX_AGE': settings.DATABASES['default']['CONN_MAX_AGE'],
+        'OPTIONS': settings.DATABASES['default']['OPTIONS'],
+    },
+}
+STATIC_STORAGE = (
+    'core.staticfiles.storage.CompressedManifestStaticFilesStorage'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон страниц posts на синтетических данных: '
+        'p50/p95/p99, SQL-запросы на запрос и пропускная способность'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=list(SCALES), default='small',
+            help='Размер набора данных'
+        )
+        for name in SCALES['tiny']:
+            parser.add_argument(
+                f'--{name}', type=int,
+                help=f'Переопределить количество ({name}) из --scale'
+            )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append',
+            help='Запустить только указанные сценарии'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Сбрасывать кэш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Файл базовой линии, по умолчанию '
+                 'BENCHMARK_DIR/baseline-<scale>.json'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новую базовую линию'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост p95 относительно базовой линии'
+        )
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='Работать в текущей базе, а не в отдельной тестовой'
+        )
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Не создавать данные, замерять на уже имеющихся'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=0,
+            help='Дополнительно сравнить WSGI и ASGI на страницах чтения '
+                 'при таком числе одновременных запросов'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Число запросов на страницу при сравнении серверов'
+        )
+        parser.add_argument(
+            '--db-workload', action='store_true',
+            help='Дополнительно сравнить стандартный и настроенный SQLite '
+                 'при одновременных чтении ленты и записи комментариев'
+        )
+        parser.add_argument('--db-readers', type=int, default=4)
+        parser.add_argument('--db-writers', type=int, default=2)
+        parser.add_argument(
+            '--db-duration', type=float, default=5,
+            help='Длительность нагрузки на каждый профиль, секунд'
+        )
+        parser.add_argument(
+            '--static', action='store_true',
+            help='Дополнительно собрать статику и замерить запросы и байты '
+                 'статики на страницу и отдачу файла через '
+                 'core.staticfiles против обработчика Django'
+        )
+        parser.add_argument(
+            '--static-asset', default='admin/css/base.css',
+            help='Файл статики для замера пропускной способности'
+        )
+
+    def handle(self, *args, **options):
+        counts = dict(SCALES[options['scale']])
+        for name in counts:
+            if options[name] is not None:
+                counts[name] = options[name]
+        baseline_path = options['baseline'] or os.path.join(
+            settings.BENCHMARK_DIR, f'baseline-{options["scale"]}.json'
+        )
+
+        results, servers, databases, static = self.run_all(options, counts)
+
+        baseline = None
+        if os.path.exists(baseline_path) and not options['save_baseline']:
+            baseline = load_baseline(baseline_path)
+        self.stdout.write(format_table(results, baseline))
+        if servers:
+            self.stdout.write(format_servers(servers))
+        if databases:
+            self.stdout.write(format_mixed(databases))
+        if static:
+            transfer, static_servers = static
+            self.stdout.write(format_static(transfer))
+            self.stdout.write(format_servers(static_servers))
+        if options['save_baseline']:
+            save_baseline(baseline_path, results, {
+                'scale': options['scale'],
+                'counts': counts,
+                'iterations': options['iterations'],
+                'cold': options['cold'],
+            })
+            self.stdout.write(f'Базовая линия записана в {baseline_path}')
+        elif baseline is not None:
+            regressions = compare(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно базовой линии:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_all(self, options, counts):
+        """Замеры сценариев и серверов, по умолчанию в тестовой базе."""
+        if not options['current_db']:
+            setup_test_environment()
+            databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            if not options['no_seed']:
+                seed(**counts)
+            results = self.run_scenarios(options)
+            servers = None
+            if options['concurrency']:
+                servers = self.run_servers(options)
+            workload = None
+            if options['db_workload']:
+                workload = self.run_databases(options)
+            static = self.run_static(options) if options['static'] else None
+        finally:
+            if not options['current_db']:
+                teardown_databases(databases, verbosity=0)
+                teardown_test_environment()
+        return results, servers, workload, static
+
+    def run_scenarios(self, options):
+        selected = options['scenario']
+        before = cache.clear if options['cold'] else None
+        results = {}
+        for name, scenario in scenarios().items():
+            if selected and name not in selected:
+                continue
+            cache.clear()
+            results[name] = measure(
+                scenario,
+                options['iterations'],
+                warmup=options['warmup'],
+                before=before,
+            )
+        return results
+
+    def run_servers(self, options):
+        """Пропускная способность страниц чтения под WSGI и ASGI."""
+        selected = options['scenario']
+        concurrency = options['concurrency']
+        wsgi = get_wsgi_application()
+        asgi = WsgiToAsgi(wsgi, max_workers=concurrency)
+        results = {}
+        for name, (path, cookie) in read_paths().items():
+            if selected and name not in selected:
+                continue
+            results[name] = {}
+            for server, run, application in (
+                ('wsgi', run_wsgi, wsgi), ('asgi', run_asgi, asgi)
+            ):
+                cache.clear()
+                results[name][server] = run(
+                    application, path, options['requests'], concurrency,
+                    cookie
+                )
+        return results
+
+    def run_databases(self, options):
+        """Смешанная нагрузка на копии базы с каждым профилем SQLite.
+
+        Для профиля без CONN_MAX_AGE соединение закрывается после каждой
+        операции, как в конце запроса.
+        """
+        directory = tempfile.mkdtemp()
+        results = {}
+        try:
+            for profile, database in DB_PROFILES.items():
+                alias = f'benchmark_{profile}'
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                clone_sqlite('default', path)
+                with temporary_database(alias, {**database, 'NAME': path}):
+                    read, write = db_workload(alias)
+                    if not database['CONN_MAX_AGE']:
+                        read, write = (
+                            self.per_request(alias, read),
+                            self.per_request(alias, write),
+                        )
+                    results[profile] = run_mixed(
+                        [('read', read)] * options['db_readers']
+                        + [('write', write)] * options['db_writers'],
+                        options['db_duration'],
+                    )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return results
+
+    def run_static(self, options):
+        """Статика страниц чтения из собранного со сжатием каталога.
+
+        Отдача одного файла сравнивается с обработчиком статики Django,
+        которым пользуется runserver.
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            with override_settings(STATIC_ROOT=directory,
+                                   STATICFILES_STORAGE=STATIC_STORAGE):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            wsgi = get_wsgi_application()
+            application = StaticFilesApplication(wsgi, root=directory)
+            client = Client()
+            pages = {}
+            for name, (path, cookie) in read_paths().items():
+                cache.clear()
+                html = client.get(path, HTTP_COOKIE=cookie).content.decode()
+                pages[name] = page_assets(html, settings.STATIC_URL)
+            transfer = static_transfer(application, pages)
+            asset = settings.STATIC_URL + options['static_asset']
+            concurrency = options['concurrency'] or 4
+            servers = {'static': {
+                'core': run_wsgi(application, asset, options['requests'],
+                                 concurrency),
+                'django': run_wsgi(StaticFilesHandler(wsgi), asset,
+                                   options['requests'], concurrency),
+            }}
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return transfer, servers
+
+    @staticmethod
+    def per_request(alias, function):
+        def wrapper():
+            try:
+                function()
+            finally:
+                connections[alias].close()
+        return wrapper
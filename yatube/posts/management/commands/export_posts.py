@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FIELDS, FORMATS, export_rows, write_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии или подписки в JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл для записи, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--model', choices=list(FIELDS), default='posts',
+            help='Что выгружать'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS, default='jsonl',
+            help='Формат файла'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один раз'
+        )
+
+    def handle(self, *args, **options):
+        rows = export_rows(options['model']).iterator(
+            chunk_size=options['chunk_size']
+        )
+        started = time.monotonic()
+        if options['output'] == '-':
+            written = write_records(
+                sys.stdout, options['format'], options['model'], rows
+            )
+        else:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as file:
+                written = write_records(
+                    file, options['format'], options['model'], rows
+                )
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено записей: {written} за {elapsed:.1f} с '
+            f'({written / max(elapsed, 1e-6):.0f} в секунду)'
+        )
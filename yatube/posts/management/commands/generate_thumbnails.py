@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import enqueue
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь генерацию недостающих миниатюр постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать миниатюры и для постов, где они уже есть'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        for post_id in post_ids:
+            enqueue('posts.generate_thumbnails', post_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь постов: {len(post_ids)}'
+        ))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (FIELDS, FORMATS, Importer, TransferError,
+                            read_records)
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты, комментарии или подписки из JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл с записями')
+        parser.add_argument(
+            '--model', choices=list(FIELDS), default='posts',
+            help='Что загружать'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Записей в одной пачке и транзакции'
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных пользователей и группы'
+        )
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        importer = Importer(
+            options['model'],
+            options['batch_size'],
+            create_missing=options['create_missing'],
+        )
+        started = time.monotonic()
+        failure = None
+        try:
+            with open(path, encoding='utf-8', newline='') as file:
+                for count in importer.run(read_records(file, fmt)):
+                    if options['verbosity'] > 1:
+                        self.stdout.write(
+                            f'Пачка: {count}, всего: {importer.imported}'
+                        )
+        except TransferError as error:
+            failure = error
+        loaded = time.monotonic() - started
+        if importer.imported:
+            importer.refresh()
+        if failure is not None:
+            raise CommandError(
+                f'{failure}. Загружено до ошибки: {importer.imported}'
+            )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {importer.imported} за {loaded:.1f} с '
+            f'({importer.imported / max(loaded, 1e-6):.0f} в секунду), '
+            f'пересчёт связанных данных: {elapsed - loaded:.1f} с'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписчиков'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stats, posts = recount()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено пользователей: {stats}, постов: {posts}'
+        ))
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:20
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Индекс наполняется после миграций текущим стеммером, см.
+# posts.signals.search_index_migrated.
+TABLE = 'posts_search'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            'USING fts5(post_id UNINDEXED, body)'
+        )
+    except OperationalError:
+        # SQLite собран без FTS5: поиск работает на обратном индексе.
+        pass
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_comment_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
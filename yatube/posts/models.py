@@ -1,8 +1,75 @@
+import json
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models
+from django.db.models import F
+from django.db.models.signals import post_save
 
 User = get_user_model()
 
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__email',
+    'author__is_staff',
+    'author__is_active',
+    'author__date_joined',
+    'group__description',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа подтягиваются одним JOIN,
+        неиспользуемые в шаблонах колонки не загружаются.
+        """
+        return self.select_related('author', 'group').defer(
+            *FEED_DEFERRED_FIELDS
+        )
+
+
+class FollowQuerySet(models.QuerySet):
+    def _execute(self, sql, params):
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def follow(self, user, author):
+        """Подписывает одним INSERT, повторная подписка игнорируется.
+
+        Возвращает True, если подписка создана. Для новой строки она
+        читается из базы и post_save отправляется вручную.
+        """
+        ops = connections[self.db].ops
+        meta = self.model._meta
+        table = ops.quote_name(meta.db_table)
+        columns = ', '.join(
+            ops.quote_name(meta.get_field(name).column)
+            for name in ('user', 'author', 'pull_on_read')
+        )
+        sql = (
+            f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+            f'({columns}) VALUES (%s, %s, %s) '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+        )
+        created = self._execute(sql, [user.pk, author.pk, False]) > 0
+        if created:
+            post_save.send(
+                sender=self.model, using=self.db, created=True, raw=False,
+                update_fields=None,
+                instance=self.get(user=user, author=author),
+            )
+        return created
+
+    def unfollow(self, user, author):
+        """Отписывает; без подписки обходится одним SELECT."""
+        follow = self.filter(user=user, author=author).first()
+        if follow is None:
+            return False
+        follow.delete()
+        return True
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -42,13 +109,48 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев',
+        default=0,
+        editable=False
+    )
+    thumbnails = models.TextField(
+        verbose_name='Миниатюры',
+        blank=True,
+        editable=False,
+        help_text='URL и размеры готовых миниатюр картинки в JSON'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[0:15]
 
+    @property
+    def thumbnail_variants(self):
+        try:
+            return json.loads(self.thumbnails) if self.thumbnails else {}
+        except ValueError:
+            return {}
+
+    @property
+    def thumbnail(self):
+        """Миниатюра для лент или None, пока она не готова."""
+        return self.thumbnail_variants.get('feed')
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -70,6 +172,15 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -82,3 +193,91 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+    pull_on_read = models.BooleanField(
+        verbose_name='Читать при запросе',
+        default=False,
+        help_text='Посты автора не копируются в ленту, а читаются из '
+                  'таблицы постов при открытии ленты'
+    )
+
+    objects = FollowQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_feed_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик одним UPDATE без чтения значения.
+
+    Уменьшение не опускает счётчик ниже нуля.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0
+    )
+
+    @classmethod
+    def change(cls, user_id, field, delta):
+        if not change_counter(cls.objects.filter(pk=user_id), field, delta):
+            if delta > 0:
+                cls.objects.get_or_create(user_id=user_id)
+                change_counter(cls.objects.filter(pk=user_id), field, delta)
@@ -0,0 +1,119 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты разбиваются на слова и приводятся к основам русским стеммером,
+поэтому «пост», «посты» и «постами» находятся одним запросом. Индекс
+хранится в таблице SQLite FTS5, а если она недоступна — в обратном
+индексе на диске (``settings.SEARCH_INDEX_PATH``).
+"""
+import re
+from functools import lru_cache
+from itertools import chain
+
+from django.conf import settings
+
+from ..models import Comment, Post
+from .backends import COMMENT, POST, FTS5Backend, InvertedIndexBackend
+from .stemmer import stem
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Основы слов текста в порядке следования."""
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
+
+
+@lru_cache(maxsize=None)
+def _backend(name, path):
+    if name == 'auto':
+        name = 'fts5' if FTS5Backend.available() else 'inverted'
+    if name == 'fts5':
+        return FTS5Backend()
+    return InvertedIndexBackend(path)
+
+
+def get_backend():
+    """Бэкенд из ``settings.SEARCH_BACKEND``: fts5, inverted или auto."""
+    return _backend(settings.SEARCH_BACKEND, settings.SEARCH_INDEX_PATH)
+
+
+def index_post(post_id, text):
+    get_backend().index(POST, post_id, post_id, tokenize(text))
+
+
+def index_comment(comment_id, post_id, text):
+    get_backend().index(COMMENT, comment_id, post_id, tokenize(text))
+
+
+def remove(kind, object_id):
+    get_backend().remove(kind, object_id)
+
+
+def search_posts(query):
+    """pk постов, подходящих под запрос по тексту или комментариям,
+    от самых релевантных.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search_posts(terms, settings.SEARCH_MAX_RESULTS)
+
+
+def search_objects(kind, query):
+    """pk постов или комментариев, в тексте которых есть все слова."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search_objects(
+        kind, terms, settings.SEARCH_MAX_RESULTS
+    )
+
+
+def _documents(posts, comments):
+    """Документы индекса из строк (pk, текст) и (pk, post_id, текст)."""
+    return chain(
+        ((POST, pk, pk, tokenize(text)) for pk, text in posts),
+        (
+            (COMMENT, pk, post_id, tokenize(text))
+            for pk, post_id, text in comments
+        ),
+    )
+
+
+def rebuild():
+    """Заново индексирует все посты и комментарии."""
+    backend = get_backend()
+    backend.clear()
+    backend.index_many(_documents(
+        Post.objects.values_list('pk', 'text').iterator(),
+        Comment.objects.values_list('pk', 'post_id', 'text').iterator(),
+    ))
+
+
+def _rows(queryset, pks, fields, chunk_size):
+    pks = sorted(pks)
+    for start in range(0, len(pks), chunk_size):
+        yield from queryset.filter(
+            pk__in=pks[start:start + chunk_size]
+        ).values_list(*fields)
+
+
+def index_objects(posts=(), comments=(), chunk_size=500):
+    """Индексирует посты и комментарии с перечисленными pk, не трогая
+    остальной индекс."""
+    get_backend().index_many(_documents(
+        _rows(Post.objects, posts, ('pk', 'text'), chunk_size),
+        _rows(Comment.objects, comments, ('pk', 'post_id', 'text'),
+              chunk_size),
+    ))
+
+
+def build_if_empty():
+    """Строит индекс, если он пуст, а посты уже есть.
+
+    Миграция создаёт только таблицу FTS5: наполнять индекс нужно текущим
+    стеммером, а не его копией в миграции.
+    """
+    _backend.cache_clear()
+    if get_backend().is_empty() and Post.objects.exists():
+        rebuild()
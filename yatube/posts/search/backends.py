@@ -0,0 +1,312 @@
+import json
+import math
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.db import connection
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+POST = 'post'
+COMMENT = 'comment'
+KINDS = (POST, COMMENT)
+
+
+class FTS5Backend:
+    """Индекс в виртуальной таблице SQLite FTS5.
+
+    В таблицу пишутся уже нормализованные основы слов, ранжирование —
+    встроенный bm25. rowid кодирует вид документа и его pk, поэтому
+    обновление и удаление идут по первичному ключу таблицы.
+    """
+
+    table = 'posts_search'
+    # Сколько совпадений (пост и его комментарии) учитывается на один
+    # пост результата при подсчёте суммарной релевантности.
+    hits_per_post = 10
+
+    @classmethod
+    def available(cls):
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                'AND name = %s',
+                [cls.table]
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def _rowid(kind, object_id):
+        return int(object_id) * len(KINDS) + KINDS.index(kind)
+
+    @staticmethod
+    def _match(terms):
+        return ' '.join('"{}"'.format(term.replace('"', '""'))
+                        for term in terms)
+
+    def index(self, kind, object_id, post_id, terms):
+        rowid = self._rowid(kind, object_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [rowid]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, post_id, body) '
+                'VALUES (%s, %s, %s)',
+                [rowid, post_id, ' '.join(terms)]
+            )
+
+    def index_many(self, documents):
+        for document in documents:
+            self.index(*document)
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [self._rowid(kind, object_id)]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def is_empty(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT 1 FROM {self.table} LIMIT 1')
+            return cursor.fetchone() is None
+
+    def search_posts(self, terms, limit):
+        # bm25 нельзя вызывать в агрегате: LIMIT во вложенном запросе
+        # не даёт SQLite развернуть его во внешний GROUP BY.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT post_id FROM ('
+                f'  SELECT post_id, bm25({self.table}) AS score'
+                f'  FROM {self.table} WHERE {self.table} MATCH %s'
+                '  ORDER BY rank LIMIT %s'
+                ') GROUP BY post_id ORDER BY SUM(score), post_id DESC '
+                'LIMIT %s',
+                [self._match(terms), limit * self.hits_per_post, limit]
+            )
+            return [int(row[0]) for row in cursor.fetchall()]
+
+    def search_objects(self, kind, terms, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} '
+                f'WHERE {self.table} MATCH %s AND rowid %% %s = %s '
+                'ORDER BY rank LIMIT %s',
+                [self._match(terms), len(KINDS), KINDS.index(kind), limit]
+            )
+            return [row[0] // len(KINDS) for row in cursor.fetchall()]
+
+
+class InvertedIndexBackend:
+    """Обратный индекс на чистом Python, сохраняемый в JSON-файл.
+
+    Используется, когда FTS5 недоступен. Изменения отдельных документов
+    дописываются в журнал рядом с файлом индекса, а сам файл
+    перезаписывается целиком, только когда журнал разрастается, и при
+    массовой индексации. Индекс перечитывается, если файлы изменил другой
+    процесс, а запись защищена блокировкой файла. Ранжирование — BM25
+    с теми же параметрами, что и в FTS5.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    # Сколько изменений копится в журнале до перезаписи файла индекса.
+    journal_limit = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self._lock = threading.RLock()
+        self._state = None
+        self._journal_size = 0
+        self._data = self._empty()
+
+    @staticmethod
+    def _empty():
+        return {'docs': {}, 'terms': {}}
+
+    @staticmethod
+    def _key(kind, object_id):
+        return f'{kind}:{object_id}'
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _files_state(self):
+        return self._stat(self.path), self._stat(self.journal_path)
+
+    def _load(self):
+        state = self._files_state()
+        if state == self._state:
+            return
+        data = self._empty()
+        if state[0] is not None:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        self._journal_size = 0
+        if state[1] is not None:
+            with open(self.journal_path, encoding='utf-8') as file:
+                for line in file:
+                    # Строку, которую другой процесс ещё дописывает,
+                    # прочитаем при следующей загрузке.
+                    if not line.endswith('\n'):
+                        break
+                    self._apply(data, json.loads(line))
+                    self._journal_size += 1
+        self._data, self._state = data, state
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(self._data, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        # Журнал уже учтён в файле; повторное применение его записей
+        # читателем, успевшим увидеть оба файла, ничего не меняет.
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._journal_size = 0
+        self._state = self._files_state()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            lock_file = None
+            if fcntl is not None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                lock_file = open(f'{self.path}.lock', 'w')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield self._data
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    @contextmanager
+    def _writing(self):
+        with self._locked() as data:
+            yield data
+            self._save()
+
+    def _record(self, entry):
+        """Применяет изменение одного документа и дописывает его в журнал."""
+        with self._locked() as data:
+            self._apply(data, entry)
+            if self._journal_size >= self.journal_limit:
+                self._save()
+                return
+            with open(self.journal_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._journal_size += 1
+            self._state = self._files_state()
+
+    def _apply(self, data, entry):
+        if entry[0] == 'add':
+            self._add(data, *entry[1:])
+        else:
+            self._discard(data, self._key(*entry[1:]))
+
+    def _discard(self, data, key):
+        doc = data['docs'].pop(key, None)
+        if doc is None:
+            return
+        for term in doc[2]:
+            postings = data['terms'][term]
+            del postings[key]
+            if not postings:
+                del data['terms'][term]
+
+    def _add(self, data, kind, object_id, post_id, terms):
+        key = self._key(kind, object_id)
+        self._discard(data, key)
+        data['docs'][key] = [post_id, len(terms), sorted(set(terms))]
+        for term in terms:
+            postings = data['terms'].setdefault(term, {})
+            postings[key] = postings.get(key, 0) + 1
+
+    def index(self, kind, object_id, post_id, terms):
+        self._record(['add', kind, object_id, post_id, terms])
+
+    def index_many(self, documents):
+        """Индексирует документы с одной записью файла в конце."""
+        with self._writing() as data:
+            for document in documents:
+                self._add(data, *document)
+
+    def remove(self, kind, object_id):
+        self._record(['remove', kind, object_id])
+
+    def clear(self):
+        with self._writing() as data:
+            data.update(self._empty())
+
+    def is_empty(self):
+        with self._lock:
+            self._load()
+            return not self._data['docs']
+
+    def _scores(self, terms, kind=None):
+        """BM25 документов, содержащих все термины запроса."""
+        with self._lock:
+            self._load()
+            docs, index = self._data['docs'], self._data['terms']
+            postings = [index.get(term, {}) for term in set(terms)]
+            if not docs or not all(postings):
+                return {}, docs
+            keys = set.intersection(*(set(p) for p in postings))
+            if kind is not None:
+                keys = {key for key in keys if key.startswith(f'{kind}:')}
+            average = sum(doc[1] for doc in docs.values()) / len(docs)
+            scores = {}
+            for key in keys:
+                length = docs[key][1]
+                score = 0
+                for posting in postings:
+                    idf = math.log(
+                        (len(docs) - len(posting) + 0.5)
+                        / (len(posting) + 0.5) + 1
+                    )
+                    frequency = posting[key]
+                    score += idf * frequency * (self.k1 + 1) / (
+                        frequency + self.k1 * (
+                            1 - self.b + self.b * length / average
+                        )
+                    )
+                scores[key] = score
+            return scores, docs
+
+    def search_posts(self, terms, limit):
+        scores, docs = self._scores(terms)
+        totals = {}
+        for key, score in scores.items():
+            post_id = docs[key][0]
+            totals[post_id] = totals.get(post_id, 0) + score
+        ranked = sorted(totals, key=lambda pk: (-totals[pk], -pk))
+        return ranked[:limit]
+
+    def search_objects(self, kind, terms, limit):
+        scores, _ = self._scores(terms, kind)
+        ranked = sorted(scores, key=lambda key: -scores[key])
+        return [int(key.split(':')[1]) for key in ranked[:limit]]
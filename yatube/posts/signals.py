@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db.models.signals import (post_delete, post_init, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import cache, search, timeline
+from .models import Comment, Follow, Group, Post, UserStats, change_counter
+
+SEARCH_MIGRATION = ('posts', '0016_search_index')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.change(instance.author_id, 'posts_count', 1)
+        timeline.publish(instance)
+    cache.bump(*cache.post_scopes(instance, instance._loaded_group_id))
+    enqueue('posts.index_post', instance.pk)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    UserStats.change(instance.author_id, 'posts_count', -1)
+    cache.bump(*cache.post_scopes(instance))
+    enqueue('posts.unindex', search.POST, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+        cache.bump(*cache.post_scopes(instance.post))
+    enqueue('posts.index_comment', instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_counter(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+    cache.bump(f'post:{instance.post_id}')
+    enqueue('posts.unindex', search.COMMENT, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.change(instance.author_id, 'followers_count', 1)
+        cache.bump(f'followers:{instance.author_id}')
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    UserStats.change(instance.author_id, 'followers_count', -1)
+    cache.bump(f'followers:{instance.author_id}')
+    timeline.purge(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cache.bump('groups', f'group:{instance.pk}')
+
+
+@receiver(post_migrate)
+def search_index_migrated(sender, app_config, using, plan=(), **kwargs):
+    """Наполняет индекс после миграции, создавшей его таблицу."""
+    if app_config.name != 'posts' or using != 'default':
+        return
+    for migration, backwards in plan:
+        if (migration.app_label, migration.name) == SEARCH_MIGRATION:
+            if not backwards:
+                search.build_if_empty()
+            return
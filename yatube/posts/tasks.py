@@ -0,0 +1,45 @@
+from core.tasks import task
+
+from . import search, thumbnails, timeline
+from .models import Comment, Post
+
+
+@task('posts.generate_thumbnails')
+def generate_thumbnails(post_id):
+    thumbnails.generate(post_id)
+
+
+@task('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task('posts.index_post')
+def index_post(post_id):
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True
+    ).first()
+    if text is None:
+        search.remove(search.POST, post_id)
+    else:
+        search.index_post(post_id, text)
+
+
+@task('posts.index_comment')
+def index_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).values_list(
+        'post_id', 'text'
+    ).first()
+    if comment is None:
+        search.remove(search.COMMENT, comment_id)
+    else:
+        search.index_comment(comment_id, *comment)
+
+
+@task('posts.unindex')
+def unindex(kind, object_id):
+    search.remove(kind, object_id)
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ..models import Follow, Post
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.baseline = os.path.join(self.directory, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def benchmark(self, **options):
+        out = StringIO()
+        call_command(
+            'benchmark', scale='tiny', posts=30, comments=30,
+            iterations=2, warmup=0, current_db=True,
+            baseline=self.baseline, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_benchmark_saves_and_compares_baseline(self):
+        """Прогон создаёт данные, замеряет все сценарии и сравнивает
+        результат с сохранённой базовой линией."""
+        output = self.benchmark(save_baseline=True)
+        self.assertTrue(Post.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+        with open(self.baseline, encoding='utf-8') as file:
+            results = json.load(file)['results']
+        for name in ('index', 'profile', 'post_detail', 'follow_index',
+                     'post_create', 'add_comment'):
+            with self.subTest(name=name):
+                self.assertIn(name, output)
+                self.assertGreater(results[name]['queries'], 0)
+                self.assertLessEqual(
+                    results[name]['p50_ms'], results[name]['p99_ms']
+                )
+        output = self.benchmark(
+            scenario=['index'], tolerance=100, no_seed=True
+        )
+        self.assertIn('Регрессий нет', output)
+
+    def test_benchmark_static(self):
+        """Статика страниц считается по собранному со сжатием каталогу."""
+        source = os.path.join(self.directory, 'static')
+        os.makedirs(os.path.join(source, 'css'))
+        path = os.path.join(source, 'css', 'bootstrap.min.css')
+        with open(path, 'w') as file:
+            file.write('.btn { color: red; }\n' * 500)
+        with override_settings(STATICFILES_DIRS=[source]):
+            output = self.benchmark(
+                scenario=['index'], static=True, requests=10
+            )
+        lines = output.splitlines()
+        header = next(line for line in lines if 'gzip, КБ' in line)
+        index = lines[lines.index(header) + 1].split()
+        self.assertEqual(index[0], 'index')
+        self.assertGreater(int(index[1]), int(index[2]))
+        self.assertGreater(float(index[3]), float(index[4]))
+        self.assertIn('django', output)
+
+
+class DatabaseWorkloadTests(TransactionTestCase):
+    """Копия базы снимается через backup API, которому мешает открытая
+    транзакция TestCase, поэтому здесь данные фиксируются."""
+
+    def test_benchmark_db_workload(self):
+        """Смешанная нагрузка идёт на копиях базы с обоими профилями."""
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                'benchmark', scale='tiny', posts=30, comments=30,
+                iterations=1, warmup=0, current_db=True,
+                scenario=['index'], db_workload=True, db_readers=2,
+                db_writers=1, db_duration=0.2,
+                baseline=os.path.join(directory, 'baseline.json'),
+                stdout=out,
+            )
+        output = out.getvalue()
+        for line in ('stock             read', 'tuned            write'):
+            self.assertIn(line, output)
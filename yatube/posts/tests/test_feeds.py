@@ -0,0 +1,125 @@
+import json
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(FEED_ITEMS=3)
+class FeedViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        for i in range(4):
+            Post.objects.create(
+                author=cls.author, text=f'Пост автора {i}', group=cls.group
+            )
+        Post.objects.create(author=cls.other, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+
+    def atom_titles(self, response):
+        root = ElementTree.fromstring(response.content)
+        return [
+            entry.find(f'{ATOM}title').text
+            for entry in root.iter(f'{ATOM}entry')
+        ]
+
+    def test_atom_feeds(self):
+        """Ленты Atom содержат последние посты своей области."""
+        feeds = {
+            reverse('posts:feed', args=['atom']): [
+                'Пост без группы', 'Пост автора 3', 'Пост автора 2'
+            ],
+            reverse('posts:group_feed', args=[self.group.slug, 'atom']): [
+                'Пост автора 3', 'Пост автора 2', 'Пост автора 1'
+            ],
+            reverse('posts:profile_feed', args=['other', 'atom']): [
+                'Пост без группы'
+            ],
+        }
+        for url, titles in feeds.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/atom+xml; charset=utf-8'
+                )
+                self.assertEqual(self.atom_titles(response), titles)
+
+    def test_json_feed(self):
+        response = self.client.get(
+            reverse('posts:profile_feed', args=['author', 'json'])
+        )
+        feed = json.loads(response.content)
+        self.assertEqual(feed['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual(feed['title'], 'Посты пользователя Лев Толстой')
+        item = feed['items'][0]
+        self.assertEqual(item['content_text'], 'Пост автора 3')
+        self.assertEqual(item['authors'][0]['name'], 'Лев Толстой')
+        self.assertEqual(item['tags'], ['Тестовая группа'])
+        self.assertTrue(item['url'].startswith('http://testserver/posts/'))
+
+    def test_feed_cached_until_new_post(self):
+        """Лента строится одним запросом и кэшируется до нового поста."""
+        url = reverse('posts:feed', args=['json'])
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Post.objects.create(author=self.other, text='Свежий пост')
+        response = self.client.get(url)
+        self.assertEqual(
+            json.loads(response.content)['items'][0]['content_text'],
+            'Свежий пост'
+        )
+
+    def test_feed_cache_keyed_by_scheme(self):
+        """Лента, закэшированная по HTTP, не отдаётся по HTTPS."""
+        url = reverse('posts:feed', args=['json'])
+        self.client.get(url)
+        response = self.client.get(url, secure=True)
+        item = json.loads(response.content)['items'][0]
+        self.assertTrue(item['url'].startswith('https://testserver/'))
+
+    def test_feed_conditional_get(self):
+        url = reverse('posts:group_feed', args=[self.group.slug, 'atom'])
+        response = self.client.get(url)
+        revalidated = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+        revalidated = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_unknown_feeds(self):
+        urls = [
+            reverse('posts:feed', args=['rss']),
+            reverse('posts:group_feed', args=['missing', 'atom']),
+            reverse('posts:profile_feed', args=['missing', 'json']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pages_link_feeds(self):
+        response = self.client.get(reverse('posts:post_list'))
+        self.assertContains(
+            response, reverse('posts:feed', args=['atom'])
+        )
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 import shutil
 import tempfile
+from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
@@ -8,7 +9,9 @@ from django.conf import settings
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Group, Post, Comment
+from core.models import Task
+
+from ..models import Group, Post, Comment, UserStats
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -148,3 +151,22 @@ class PostFormsTests(TestCase):
                 author=self.user
             ).exists()
         )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_failed_create_leaves_no_tasks(self):
+        """Пост, счётчик и задачи очереди пишутся в одной транзакции:
+        при ошибке в представлении откатываются вместе."""
+        post_count = Post.objects.count()
+        task_count = Task.objects.count()
+        with mock.patch(
+            'posts.views.thumbnails.schedule', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.authorized_client.post(
+                    reverse('posts:post_create'), {'text': 'Откат'}
+                )
+        self.assertEqual(Post.objects.count(), post_count)
+        self.assertEqual(Task.objects.count(), task_count)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).posts_count, post_count
+        )
@@ -1,7 +1,17 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.models import Task
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, UserStats
+from ..timeline import follow_feed
+from .utils import QueryPlanMixin
 
 User = get_user_model()
 
@@ -25,3 +35,98 @@ class PostModelTest(TestCase):
         """Проверяем, что у моделей корректно работает __str__."""
         self.assertEqual(self.post.text, str(self.post.text))
         self.assertEqual(self.group.title, str(self.group))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_counters_follow_create_and_delete(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(post.comments_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        stats.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 0)
+
+    def test_recount_command(self):
+        """Команда recount_counters исправляет разошедшиеся счётчики."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Пост') for _ in range(3)]
+        )
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
+
+    @override_settings(TASKS_EAGER=False)
+    def test_counters_updated_without_worker(self):
+        """Счётчики меняются в транзакции записи, а не воркером очереди,
+        и повтор задач не может учесть событие дважды."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertTrue(Task.objects.exists())
+        call_command('run_tasks', once=True, workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertFalse(Task.objects.exists())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса SQLite')
+class FeedIndexesTest(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты выбираются по составным индексам без сортировки."""
+        page = slice(0, settings.POSTS_PAGE)
+        queries = {
+            'post_group_pub_date_idx':
+                Post.objects.filter(group=self.group).for_feed()[page],
+            'post_author_pub_date_idx':
+                self.author.posts.for_feed()[page],
+            'comment_post_created_idx':
+                Comment.objects.filter(post=self.post).order_by('created'),
+            # Уникальное ограничение unique_follow в SQLite — автоиндекс.
+            'sqlite_autoindex_posts_follow_1':
+                Follow.objects.filter(user=self.reader, author=self.author),
+            'timeline_user_feed_idx':
+                follow_feed(self.reader).for_feed()[page],
+        }
+        for index, queryset in queries.items():
+            with self.subTest(index=index):
+                self.assertUsesIndex(queryset, index)
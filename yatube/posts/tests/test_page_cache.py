@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core import edge
+
+from ..models import Follow, Group, Post, User
+
+
+class EdgeFragmentsTests(SimpleTestCase):
+    def test_only_marked_fragments_rendered(self):
+        content = (
+            'до' + edge.mark('includes/footer.html', 'старый подвал')
+            + 'после'
+        ).encode()
+        rendered = edge.render_fragments(None, content).decode()
+        self.assertTrue(rendered.startswith('до<!--edge:'))
+        self.assertTrue(rendered.endswith('-->после'))
+        self.assertNotIn('старый подвал', rendered)
+        self.assertIn('<footer', rendered)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Исходный текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:post_list'),
+            'group': reverse('posts:group_list', args=[self.group.slug]),
+            'profile': reverse('posts:profile', args=['author']),
+            'detail': reverse('posts:post_detail', args=[self.post.pk]),
+            'about': reverse('about:author'),
+        }
+
+    def test_anonymous_pages_cached(self):
+        """Повторный анонимный запрос не рендерит страницу заново."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                first = self.client.get(url)
+                with self.assertNumQueries(0 if name in ('index', 'about')
+                                           else 1):
+                    second = self.client.get(url)
+                self.assertEqual(second.templates, [])
+                self.assertEqual(first.content, second.content)
+
+    def test_content_change_invalidates(self):
+        for url in self.urls.values():
+            self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        self.assertContains(self.client.get(self.urls['group']),
+                            'Исходный текст')
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for name in ('index', 'group', 'profile', 'detail'):
+            with self.subTest(page=name):
+                response = self.client.get(self.urls[name])
+                self.assertContains(response, 'Новый текст')
+
+    def test_shared_body_with_user_header(self):
+        """Вошедший пользователь получает общее тело со своей шапкой."""
+        self.client.get(self.urls['index'])
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        response = self.reader_client.get(self.urls['index'])
+        self.assertContains(response, 'Исходный текст')
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, 'Регистрация')
+        anonymous = self.client.get(self.urls['index'])
+        self.assertContains(anonymous, 'Регистрация')
+        self.assertNotContains(anonymous, 'Избранные авторы')
+
+    def test_personal_pages_not_shared(self):
+        """Профиль и пост вошедшему пользователю рендерятся для него."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(self.urls['profile'])
+        self.assertContains(
+            self.reader_client.get(self.urls['profile']), 'Отписаться'
+        )
+        self.client.get(self.urls['detail'])
+        self.assertContains(
+            self.reader_client.get(self.urls['detail']), 'csrfmiddlewaretoken'
+        )
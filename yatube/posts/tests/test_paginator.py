@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..utils import (BACKWARD, ELLIPSIS, CursorPaginator,
+                     UncountedPaginator, elided_page_range, encode_cursor,
+                     paginator_func)
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    def test_short_range_not_elided(self):
+        self.assertEqual(list(elided_page_range(3, 6)), [1, 2, 3, 4, 5, 6])
+
+    def test_window_around_current(self):
+        cases = {
+            1: [1, 2, 3, ELLIPSIS, 10000],
+            5: [1, 2, 3, 4, 5, 6, 7, ELLIPSIS, 10000],
+            500: [1, ELLIPSIS, 498, 499, 500, 501, 502, ELLIPSIS, 10000],
+            10000: [1, ELLIPSIS, 9998, 9999, 10000],
+        }
+        for number, links in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(elided_page_range(number, 10000)), links
+                )
+
+    def test_custom_window(self):
+        self.assertEqual(
+            list(elided_page_range(50, 100, on_each_side=1, on_ends=2)),
+            [1, 2, ELLIPSIS, 49, 50, 51, ELLIPSIS, 99, 100]
+        )
+
+
+class PaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {i}', group=cls.group)
+            for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_uncounted_pages(self):
+        posts = Post.objects.order_by('pk')
+        paginator = UncountedPaginator(posts, 10)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(2)
+        self.assertEqual([post.text for post in page][0], 'Пост 10')
+        self.assertTrue(page.has_next())
+        self.assertEqual(page.page_links, [1, 2, 3, ELLIPSIS])
+        last = UncountedPaginator(posts, 10).get_page(3)
+        self.assertEqual(len(last), 5)
+        self.assertFalse(last.has_next())
+        self.assertEqual(last.end_index(), 25)
+        self.assertEqual(last.page_links, [1, 2, 3])
+        for number in ('мусор', 0, 99):
+            with self.subTest(number=number):
+                page = UncountedPaginator(posts, 10).get_page(number)
+                self.assertEqual(page.number, 1)
+
+    def test_cursor_backward_to_start_fills_page(self):
+        """Шаг назад к началу ленты отдаёт полную первую страницу."""
+        posts = list(Post.objects.order_by('-pub_date', '-pk'))
+        cursor = encode_cursor(BACKWARD, posts[4].pub_date, posts[4].pk)
+        with self.assertNumQueries(2):
+            page = CursorPaginator(Post.objects.all(), 10).get_page(cursor)
+        self.assertEqual(list(page), posts[:10])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_count_limit(self):
+        """Выборка больше лимита пагинируется без подсчёта страниц."""
+        posts = Post.objects.order_by('pk')
+        page = paginator_func(posts, 10, 2, count_limit=100)
+        self.assertTrue(page.paginator.count_known)
+        self.assertEqual(page.paginator.count, 25)
+        page = paginator_func(posts, 10, 2, count_limit=20)
+        self.assertFalse(page.paginator.count_known)
+        self.assertEqual(len(page), 10)
+
+    @override_settings(PAGINATOR_COUNT_LIMIT=20)
+    def test_uncounted_navigation(self):
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug]),
+            {'page': 2}
+        )
+        self.assertContains(response, '?page=3')
+        self.assertContains(response, ELLIPSIS)
+        self.assertNotContains(response, 'Последняя')
+
+    @override_settings(POSTS_PAGE=1)
+    def test_navigation_elided(self):
+        """На странице только ссылки окна, а не по одной на страницу."""
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug]),
+            {'page': 12}
+        )
+        links = response.context['page_obj'].page_links
+        self.assertEqual(
+            links, [1, ELLIPSIS, 10, 11, 12, 13, 14, ELLIPSIS, 25]
+        )
+        self.assertContains(response, '?page=25')
+        self.assertNotContains(response, '?page=2"')
+        self.assertContains(response, 'Последняя')
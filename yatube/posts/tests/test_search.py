@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.tests.utils import OnCommitMixin
+
+from .. import search
+from ..models import Comment, Post
+from ..search.backends import FTS5Backend, InvertedIndexBackend
+from ..search.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова приводятся к общей основе."""
+        groups = (
+            ('пост', 'посты', 'постами', 'поста'),
+            ('красивый', 'красивая', 'красивыми'),
+            ('подписчик', 'подписчики', 'подписчиков'),
+        )
+        for forms in groups:
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(form) for form in forms}), 1)
+
+    def test_non_cyrillic_words_unchanged(self):
+        self.assertEqual(stem('Django'), 'django')
+
+
+class SearchMixin(OnCommitMixin):
+    """Общие проверки поиска для обоих бэкендов."""
+
+    backend_class = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.matching = Post.objects.create(
+                author=cls.user, text='Котята играют, котята спят'
+            )
+            cls.other = Post.objects.create(
+                author=cls.user, text='Рецепт пирога с яблоками'
+            )
+            cls.commented = Post.objects.create(author=cls.user, text='Фото')
+            Comment.objects.create(
+                post=cls.commented, author=cls.user, text='Какие котята!'
+            )
+
+    def test_backend(self):
+        self.assertIsInstance(search.get_backend(), self.backend_class)
+
+    def test_search_by_word_form_and_rank(self):
+        """Находятся другие формы слова, чаще упомянувший пост выше,
+        пост находится и по тексту комментария."""
+        self.assertEqual(
+            search.search_posts('котятами'),
+            [self.matching.pk, self.commented.pk],
+        )
+        self.assertEqual(search.search_posts('пирогов яблоко'),
+                         [self.other.pk])
+        self.assertEqual(search.search_posts('пирог котята'), [])
+
+    def test_index_follows_edit_and_delete(self):
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Пирог с котятами'
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.assertIn(other.pk, search.search_posts('котята'))
+        self.assertEqual(search.search_posts('яблоки'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.get(pk=self.commented.pk).delete()
+        self.assertEqual(
+            search.search_objects(search.COMMENT, 'котята'), []
+        )
+
+    @override_settings(POSTS_PAGE=1)
+    def test_search_view(self):
+        """Страницы результатов сохраняют запрос в ссылках."""
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'котята'})
+        self.assertEqual(list(response.context['page_obj']), [self.matching])
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%82%D1%8F%D1%82%D0%B0&amp;page=2'
+        )
+        response = self.client.get(url, {'q': 'котята', 'page': 2})
+        self.assertEqual(list(response.context['page_obj']), [self.commented])
+
+    def test_rebuild(self):
+        search.get_backend().clear()
+        self.assertEqual(search.search_posts('котята'), [])
+        search.rebuild()
+        self.assertEqual(len(search.search_posts('котята')), 2)
+
+    def test_build_if_empty(self):
+        """После миграций строится только пустой индекс."""
+        search.get_backend().clear()
+        search.build_if_empty()
+        self.assertEqual(len(search.search_posts('котята')), 2)
+        search.remove(search.POST, self.matching.pk)
+        search.build_if_empty()
+        self.assertEqual(search.search_posts('котята'),
+                         [self.commented.pk])
+
+
+@override_settings(SEARCH_BACKEND='fts5', TASKS_EAGER=True)
+class FTS5SearchTests(SearchMixin, TestCase):
+    backend_class = FTS5Backend
+
+
+class InvertedIndexSearchTests(SearchMixin, TestCase):
+    backend_class = InvertedIndexBackend
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            SEARCH_BACKEND='inverted',
+            SEARCH_INDEX_PATH=f'{cls.directory}/index.json',
+            TASKS_EAGER=True,
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        # Файл индекса не откатывается вместе с транзакцией теста.
+        search.rebuild()
+
+    def test_changes_go_to_journal(self):
+        """Отдельные изменения дописываются в журнал, не перезаписывая
+        файл индекса, и видны другому экземпляру бэкенда."""
+        backend = search.get_backend()
+        state = os.stat(backend.path).st_mtime_ns
+        backend.index(search.POST, 1000, 1000, search.tokenize('Котята'))
+        backend.remove(search.POST, self.matching.pk)
+        self.assertEqual(os.stat(backend.path).st_mtime_ns, state)
+        reader = InvertedIndexBackend(backend.path)
+        self.assertEqual(
+            reader.search_posts(search.tokenize('котята'), 10),
+            [1000, self.commented.pk]
+        )
+
+    def test_full_journal_compacted(self):
+        backend = search.get_backend()
+        with mock.patch.object(backend, 'journal_limit', 1):
+            backend.index(search.POST, 1000, 1000, ['кот'])
+            backend.index(search.POST, 1001, 1001, ['кот'])
+        self.assertFalse(os.path.exists(backend.journal_path))
+        reader = InvertedIndexBackend(backend.path)
+        self.assertEqual(reader.search_posts(['кот'], 10), [1001, 1000])
+
+
+@override_settings(TASKS_EAGER=True)
+class AdminSearchTests(OnCommitMixin, TestCase):
+    def test_admin_uses_search_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=admin, text='Старые фотографии')
+            Post.objects.create(author=admin, text='Фотоаппарат')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'фотографиями'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+    @override_settings(SEARCH_MAX_RESULTS=1)
+    def test_admin_warns_about_truncated_results(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=admin, text='Старые фотографии')
+            Post.objects.create(author=admin, text='Новые фотографии')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'фотографии'}
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        self.assertEqual(
+            [message.level_tag for message in response.context['messages']],
+            ['warning']
+        )
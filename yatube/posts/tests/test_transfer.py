@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class TransferCommandsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_jsonl(self, name, records):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return self.path(name)
+
+    def test_import_posts_in_batches(self):
+        """Посты грузятся пачками с датами из файла, а счётчики,
+        ленты подписок и поиск обновляются после загрузки."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        path = self.write_jsonl('posts.jsonl', [
+            {
+                'author': 'author',
+                'group': 'group' if i % 2 else None,
+                'text': f'Импортированный пост {i}',
+                'pub_date': f'2020-01-0{i + 1}T10:00:00+00:00',
+            }
+            for i in range(5)
+        ])
+        out = StringIO()
+        call_command(
+            'import_posts', path, batch_size=2, verbosity=2, stdout=out
+        )
+        self.assertEqual(out.getvalue().count('Пачка:'), 3)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 2)
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'pub_date__day')),
+            {f'Импортированный пост {i}': i + 1 for i in range(5)}
+        )
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 5
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 5
+        )
+        self.assertEqual(len(search.search_posts('импортированные')), 5)
+
+    def test_refresh_touches_only_imported_data(self):
+        """После импорта пересчитываются счётчики только затронутых
+        авторов и постов, а индексируются только загруженные записи."""
+        Post.objects.bulk_create([Post(author=self.reader, text='Котята')])
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Котята в корзине'},
+        ])
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).posts_count, 0
+        )
+        self.assertEqual(
+            search.search_posts('котята'),
+            [Post.objects.get(author=self.author).pk]
+        )
+
+    def test_unknown_author(self):
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'ghost', 'text': 'Пост'},
+        ])
+        with self.assertRaisesMessage(CommandError, 'ghost'):
+            call_command('import_posts', path, stdout=StringIO())
+        call_command(
+            'import_posts', path, create_missing=True, stdout=StringIO()
+        )
+        self.assertTrue(Post.objects.filter(author__username='ghost'))
+
+    def test_create_missing_users_get_stats(self):
+        """Созданные при загрузке комментариев и подписок пользователи
+        получают статистику, и их профили открываются."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comments = self.write_jsonl('comments.jsonl', [
+            {'post': post.pk, 'author': 'commenter', 'text': 'Ответ'},
+        ])
+        follows = self.write_jsonl('follows.jsonl', [
+            {'user': 'follower', 'author': 'followed'},
+        ])
+        call_command(
+            'import_posts', comments, model='comments', create_missing=True,
+            stdout=StringIO()
+        )
+        call_command(
+            'import_posts', follows, model='follows', create_missing=True,
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            UserStats.objects.filter(user__username__in=[
+                'commenter', 'follower', 'followed'
+            ]).count(),
+            3
+        )
+        self.assertEqual(
+            UserStats.objects.get(user__username='followed').followers_count,
+            1
+        )
+        for username in ('commenter', 'follower', 'followed'):
+            with self.subTest(username=username):
+                response = self.client.get(
+                    reverse('posts:profile', args=[username])
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_export_import_round_trip_csv(self):
+        """Выгруженные в CSV данные загружаются обратно без потерь."""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост, "с кавычками"'
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+        for model in ('posts', 'comments', 'follows'):
+            call_command(
+                'export_posts', self.path(f'{model}.csv'), model=model,
+                format='csv', chunk_size=1, stderr=StringIO()
+            )
+        expected = list(Post.objects.values_list('pk', 'text', 'pub_date'))
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        for model in ('posts', 'comments', 'follows'):
+            call_command(
+                'import_posts', self.path(f'{model}.csv'), model=model,
+                stdout=StringIO()
+            )
+        self.assertEqual(
+            list(Post.objects.values_list('pk', 'text', 'pub_date')),
+            expected
+        )
+        self.assertEqual(Comment.objects.get().post_id, post.pk)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+        )
+        self.assertEqual(Post.objects.get().comments_count, 1)
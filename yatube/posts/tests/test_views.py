@@ -1,3 +1,4 @@
+import re
 import shutil
 import tempfile
 
@@ -6,10 +7,18 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import post_delete, post_save
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Group, Post
+from core.models import Task
+
+from .. import thumbnails
+from ..cache import get_versions
+from ..counters import recount
+from ..models import (Comment, Follow, Group, Post, TimelineEntry,
+                      UserStats)
+from .utils import QueryBudgetMixin
 
 User = get_user_model()
 
@@ -40,6 +49,7 @@ class PostViewsTests(TestCase):
                 )
             )
         Post.objects.bulk_create(cls.post_List)
+        recount()
         cls.templates_paginator_test = {
             'posts/index.html': reverse('posts:post_list'),
             'posts/group_list.html': reverse(
@@ -106,6 +116,34 @@ class PostViewsTests(TestCase):
                 response = self.authorized_client.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 1)
 
+    def test_cursor_paginator(self):
+        """Проверка keyset-пагинации по курсору.
+        Переход вперёд и назад возвращает те же записи без COUNT(*).
+        """
+        for reverse_name in self.templates_paginator_test.values():
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(
+                    reverse_name + '?cursor=invalid'
+                )
+                first_page = response.context['page_obj']
+                self.assertEqual(len(first_page), settings.POSTS_PAGE)
+                self.assertFalse(first_page.has_previous())
+                response = self.authorized_client.get(
+                    reverse_name
+                    + f'?cursor={first_page.paginator.next_cursor}'
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(len(second_page), 1)
+                self.assertFalse(second_page.has_next())
+                response = self.authorized_client.get(
+                    reverse_name
+                    + f'?cursor={second_page.paginator.previous_cursor}'
+                )
+                self.assertEqual(
+                    [post.pk for post in response.context['page_obj']],
+                    [post.pk for post in first_page]
+                )
+
     def test_templates_pages_names_paginator_context(self):
         """Прерка контекста страниц (с пагинацией)"""
         for template, reverse_name in self.templates_paginator_test.items():
@@ -219,6 +257,35 @@ class PostViewsTests(TestCase):
             image='posts/small.gif'
         )
 
+    def test_post_thumbnail_pipeline(self):
+        """Миниатюра создаётся заранее и выводится без sorl в шаблоне"""
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=(
+                b'\x47\x49\x46\x38\x39\x61\x01\x00'
+                b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+                b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+                b'\x00\x00\x01\x00\x01\x00\x00\x02'
+                b'\x02\x4c\x01\x00\x3b'
+            ),
+            content_type='image/gif'
+        )
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=uploaded
+        )
+        self.assertIsNone(post.thumbnail)
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.thumbnail['width'], post.thumbnail['height']), (960, 339)
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, post.thumbnail['url'])
+
     def check_context(self, text, author, group, image=None):
         self.assertEqual(group, self.group)
         self.assertEqual(author, self.user)
@@ -236,16 +303,37 @@ class PostViewsTests(TestCase):
             group=self.group,
         )
         response = self.authorized_client.get(reverse('posts:post_list'))
+        Post.objects.filter(pk=post.pk).update(text='Без сигналов')
+        response_cached = self.authorized_client.get(
+            reverse('posts:post_list')
+        )
+        self.assertEqual(response.content, response_cached.content)
         Post.objects.filter(pk=post.pk).delete()
         response_del = self.authorized_client.get(reverse('posts:post_list'))
-        self.assertEqual(response.content, response_del.content)
-        cache.clear()
-        response_clear_cache = self.authorized_client.get(
-            reverse('posts:post_list')
+        self.assertNotEqual(response.content, response_del.content)
+
+    def test_cache_varies_on_page(self):
+        """Каждая страница ленты кэшируется отдельно"""
+        for reverse_name in self.templates_paginator_test.values():
+            with self.subTest(reverse_name=reverse_name):
+                first = self.authorized_client.get(reverse_name)
+                second = self.authorized_client.get(reverse_name + '?page=2')
+                self.assertNotEqual(first.content, second.content)
+
+    def test_cache_invalidated_on_comment(self):
+        """Новый комментарий сбрасывает кэш лент поста"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            group=self.group,
+        )
+        versions = get_versions('feed', f'group:{self.group.pk}')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Комментарий'}
         )
         self.assertNotEqual(
-            response_del.content,
-            response_clear_cache.content
+            versions, get_versions('feed', f'group:{self.group.pk}')
         )
 
 
@@ -297,3 +385,362 @@ class TestSubs(TestCase):
         authorized_client.force_login(self.user_not_sub)
         response = authorized_client.get(reverse('posts:follow_index'))
         self.assertEqual(self.follow_count, len(response.context['page_obj']))
+
+    def test_repeated_follow_creates_one_row(self):
+        """Повторная подписка не создаёт дубликат и не меняет счётчик."""
+        url = reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user_author.username}
+        )
+        self.authorized_client.get(url)
+        self.authorized_client.get(url)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user_author).followers_count, 1
+        )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_follow_and_unfollow_single_statement(self):
+        """Подписка и отписка выполняются одним запросом к Follow."""
+        self.assertTrue(Follow.objects.follow(self.user, self.user_author))
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                Follow.objects.follow(self.user, self.user_author)
+            )
+        self.assertTrue(Follow.objects.unfollow(self.user, self.user_author))
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                Follow.objects.unfollow(self.user, self.user_author)
+            )
+
+    def test_follow_signals_get_saved_row(self):
+        """Сигналы подписки и отписки получают строку из базы с pk."""
+        received = []
+
+        def handler(sender, instance, **kwargs):
+            received.append(instance.pk)
+
+        post_save.connect(handler, sender=Follow)
+        post_delete.connect(handler, sender=Follow)
+        try:
+            Follow.objects.follow(self.user, self.user_author)
+            follow = Follow.objects.get(user=self.user)
+            Follow.objects.unfollow(self.user, self.user_author)
+        finally:
+            post_save.disconnect(handler, sender=Follow)
+            post_delete.disconnect(handler, sender=Follow)
+        self.assertEqual(received, [follow.pk, follow.pk])
+
+    def test_new_post_fan_out_to_followers(self):
+        """Новый пост автора попадает в материализованную ленту
+        подписчика, а после отписки удаляется из неё.
+        """
+        Follow.objects.create(user=self.user, author=self.user_author)
+        post = Post.objects.create(
+            author=self.user_author,
+            text='Новый пост',
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user_author.username})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user).exists()
+        )
+
+    @override_settings(FOLLOW_FEED_FAN_OUT_INLINE=0, TASKS_EAGER=False)
+    def test_popular_author_fan_out_queued(self):
+        """Раскладка поста автора с большим числом подписчиков уходит
+        в очередь задач, а не выполняется в запросе.
+        """
+        Follow.objects.create(user=self.user, author=self.user_author)
+        post = Post.objects.create(author=self.user_author, text='Новый пост')
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertTrue(
+            Task.objects.filter(
+                name='posts.fan_out', args=f'[{post.pk}]'
+            ).exists()
+        )
+
+    @override_settings(FOLLOW_FEED_PULL_THRESHOLD=0)
+    def test_prolific_author_pulled_on_read(self):
+        """Посты очень активного автора не копируются в ленту,
+        но показываются на странице подписок.
+        """
+        self.authorized_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user_author.username})
+        )
+        Post.objects.create(author=self.user_author, text='Ещё пост')
+        self.assertTrue(
+            Follow.objects.get(user=self.user).pull_on_read
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user).exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        for i in range(settings.POSTS_PAGE):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description='Описание',
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(author=author, text='Пост', group=group)
+            Post.objects.create(author=author, text='Пост', group=cls.group)
+        cls.author = author
+
+    def test_feed_views_query_budget(self):
+        """Количество запросов лент не зависит от числа постов
+        на странице.
+        """
+        budgets = {
+            reverse('posts:post_list'): 3,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 5,
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ): 4,
+            reverse('posts:follow_index'): 4,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.authorized_client, url, budget)
+
+
+@override_settings(COMMENTS_PAGE=2)
+class CommentsPaginationTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for i in range(5):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader{i}'),
+                text=f'Комментарий {i}',
+            )
+
+    def test_post_detail_shows_first_comments_page(self):
+        """На странице поста первая страница комментариев по порядку,
+        авторы загружаются без отдельного запроса на комментарий.
+        """
+        response = self.assertQueryBudget(
+            self.client,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            3
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ['Комментарий 0', 'Комментарий 1'],
+        )
+        self.assertContains(response, comments.paginator.next_cursor)
+
+    def test_comments_fragment_endpoint(self):
+        """JSON-фрагмент отдаёт следующие страницы до конца списка."""
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        texts = []
+        cursor = ''
+        while cursor is not None:
+            data = self.client.get(url, {'cursor': cursor}).json()
+            texts.extend(
+                text for text in (f'Комментарий {i}' for i in range(5))
+                if text in data['html']
+            )
+            cursor = data['next']
+        self.assertEqual(texts, [f'Комментарий {i}' for i in range(5)])
+
+    def test_comments_fragment_unknown_post(self):
+        url = reverse('posts:comments', kwargs={'post_id': 0})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(COMMENTS_STREAM_MIN=20, COMMENTS_STREAM_BATCH=10)
+class StreamingPostDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Обсуждение')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Отзыв {i}')
+            for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_many_comments_streamed(self):
+        """Страница уходит частями: начало, комментарии по 10, конец."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 5)
+        html = b''.join(chunks).decode()
+        self.assertEqual(
+            re.findall(r'Отзыв (\d+)', html), [str(i) for i in range(25)]
+        )
+        self.assertNotIn('<!--slot:', html)
+        self.assertTrue(html.rstrip().endswith('</html>'))
+        cached = self.client.get(self.url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content.decode(), html)
+
+    def test_streamed_form_sets_csrf_cookie(self):
+        """Шаблон рендерится до ответа, и CSRF-cookie попадает в него."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        html = b''.join(response.streaming_content).decode()
+        self.assertIn('csrfmiddlewaretoken', html)
+
+    @override_settings(COMMENTS_STREAM_MIN=50)
+    def test_short_pages_rendered_whole(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Отзыв 24')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = {
+            'index': reverse('posts:post_list'),
+            'group': reverse('posts:group_list', args=[self.group.slug]),
+            'profile': reverse('posts:profile', args=[self.author.username]),
+            'detail': reverse('posts:post_detail', args=[self.post.pk]),
+        }
+
+    def test_unchanged_pages_not_modified(self):
+        """Повторный запрос с ETag или Last-Modified получает 304."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                revalidated = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(revalidated.status_code, 304)
+                revalidated = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(revalidated.status_code, 304)
+
+    def test_not_modified_skips_feed_query(self):
+        """Ответ 304 не выполняет запрос ленты и не рендерит шаблон."""
+        response = self.client.get(self.urls['group'])
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(
+                self.urls['group'], HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def test_changes_invalidate_validators(self):
+        """Новый пост, комментарий и подписка меняют ETag страниц."""
+        changes = {
+            'index': lambda: Post.objects.create(
+                author=self.reader, text='Новый пост'
+            ),
+            'group': lambda: Post.objects.create(
+                author=self.reader, text='Новый пост', group=self.group
+            ),
+            'profile': lambda: Follow.objects.create(
+                user=self.reader, author=self.author
+            ),
+            'detail': lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(page=name):
+                etag = self.client.get(self.urls[name])['ETag']
+                change()
+                response = self.client.get(
+                    self.urls[name], HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_own_post_invalidates_without_worker(self):
+        """Версии кэша меняются в запросе, а не в очереди задач:
+        автор сразу видит свой пост, даже пока воркер не запущен."""
+        client = Client()
+        client.force_login(self.author)
+        etag = client.get(self.urls['index'])['ETag']
+        client.post(reverse('posts:post_create'), {'text': 'Свежий пост'})
+        response = client.get(self.urls['index'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_comment_delete_invalidates_detail(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        etag = self.client.get(self.urls['detail'])['ETag']
+        comment.delete()
+        response = self.client.get(
+            self.urls['detail'], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_validators_depend_on_user(self):
+        """Страница анонима не подходит авторизованному пользователю,
+        которому Last-Modified не отдаётся.
+        """
+        etag = self.client.get(self.urls['index'])['ETag']
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(self.urls['index'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        revalidated = client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_missing_objects_still_404(self):
+        urls = [
+            reverse('posts:group_list', args=['missing']),
+            reverse('posts:profile', args=['missing']),
+            reverse('posts:post_detail', args=[0]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов на один запрос к странице."""
+
+    def assertQueryBudget(self, client, url, budget):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        executed = len(context.captured_queries)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+        self.assertLessEqual(
+            executed, budget,
+            f'{url}: {executed} запросов при бюджете {budget}:\n{queries}'
+        )
+        return response
+
+
+class QueryPlanMixin:
+    """Проверка плана запроса через EXPLAIN QUERY PLAN SQLite."""
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        """Запрос читает таблицу по индексу и не сортирует строки."""
+        plan = self.query_plan(queryset)
+        self.assertIn(f'INDEX {index} ', plan, plan)
+        self.assertNotIn('TEMP B-TREE', plan, plan)
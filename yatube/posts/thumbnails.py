@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import enqueue
+
+from . import cache
+from .models import Post
+
+
+def render_variants(image):
+    """Создаёт все варианты из ``settings.POST_THUMBNAILS``."""
+    variants = {}
+    for name, (geometry, options) in settings.POST_THUMBNAILS.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        variants[name] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+    return variants
+
+
+def generate(post_id):
+    """Генерирует миниатюры поста и сохраняет их в строке поста.
+
+    Запись выполняется, только если картинка не успела смениться.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return
+    variants = render_variants(post.image)
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(variants)
+    )
+    if updated:
+        cache.bump(*cache.post_scopes(post))
+
+
+def schedule(post):
+    """Ставит генерацию миниатюр в очередь фоновых задач."""
+    if post.thumbnails:
+        Post.objects.filter(pk=post.pk).update(thumbnails='')
+        post.thumbnails = ''
+    if not post.image:
+        return
+    enqueue('posts.generate_thumbnails', post.pk)
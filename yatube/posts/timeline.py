@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db.models import F, Q
+
+from core.tasks import enqueue
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+# Ключи сортировки ленты подписок. В материализованной ленте это колонки
+# TimelineEntry, чтобы выборка шла по индексу timeline_user_feed_idx.
+FEED_ORDERING = '-feed_pub_date'
+FEED_KEY = 'feed_post'
+
+
+def _entries(user_ids, post):
+    for user_id in user_ids:
+        yield TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FOLLOW_FEED_BATCH,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id,
+        pull_on_read=False,
+    ).values_list('user_id', flat=True)
+    _bulk_insert(_entries(followers.iterator(), post))
+
+
+def publish(post):
+    """Раскладывает новый пост сразу, если у автора немного подписчиков,
+    а для популярного автора ставит раскладку в очередь задач."""
+    followers = UserStats.objects.filter(pk=post.author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if (followers or 0) > settings.FOLLOW_FEED_FAN_OUT_INLINE:
+        enqueue('posts.fan_out', post.pk)
+    else:
+        fan_out(post)
+
+
+def backfill(follow):
+    """Копирует посты автора в ленту нового подписчика.
+
+    Посты очень активного автора не копируются: подписка помечается
+    ``pull_on_read`` и лента дочитывает их из таблицы постов.
+    """
+    posts = Post.objects.filter(author_id=follow.author_id)
+    if posts.count() > settings.FOLLOW_FEED_PULL_THRESHOLD:
+        Follow.objects.filter(
+            user_id=follow.user_id, author_id=follow.author_id
+        ).update(pull_on_read=True)
+        return
+    _bulk_insert([
+        TimelineEntry(
+            user_id=follow.user_id,
+            post_id=post_id,
+            author_id=follow.author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.values_list('pk', 'pub_date')
+    ])
+
+
+def purge(follow):
+    """Удаляет посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id,
+        author_id=follow.author_id,
+    ).delete()
+
+
+def follow_feed(user):
+    """Лента подписок: посты из материализованной ленты пользователя
+    и посты авторов, которые читаются при запросе.
+
+    Сортируется по ``FEED_ORDERING`` и ``FEED_KEY``.
+    """
+    pulled = Follow.objects.filter(user=user, pull_on_read=True)
+    if not pulled.exists():
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_pub_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        )
+    else:
+        entries = TimelineEntry.objects.filter(user=user)
+        posts = Post.objects.filter(
+            Q(pk__in=entries.values('post'))
+            | Q(author__in=pulled.values('author'))
+        ).annotate(feed_pub_date=F('pub_date'), feed_post=F('pk'))
+    return posts.order_by(FEED_ORDERING, f'-{FEED_KEY}')
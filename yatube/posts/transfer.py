@@ -0,0 +1,300 @@
+"""Потоковый импорт и экспорт постов, комментариев и подписок.
+
+Записи читаются и пишутся по одной (JSONL или CSV), в память попадает
+только текущая пачка. Авторы, группы и посты ссылаются друг на друга
+по естественным ключам: username, slug группы и id поста.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, DateTimeField, Max, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, search, timeline
+from .counters import recount_posts, recount_users
+from .models import Comment, Follow, Group, Post, User
+
+FORMATS = ('jsonl', 'csv')
+
+FIELDS = {
+    'posts': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comments': ('id', 'post', 'author', 'text', 'created'),
+    'follows': ('user', 'author'),
+}
+
+# Поле даты с auto_now_add, которую нужно взять из файла.
+DATE_FIELDS = {'posts': 'pub_date', 'comments': 'created'}
+# Строк в одном UPDATE при восстановлении дат.
+DATES_BATCH = 200
+# pk в одном запросе при обновлении производных данных после импорта.
+REFRESH_BATCH = 500
+
+
+class TransferError(Exception):
+    pass
+
+
+def export_rows(kind):
+    """Строки таблицы в порядке pk в виде кортежей из ``FIELDS``."""
+    if kind == 'posts':
+        return Post.objects.order_by('pk').values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image'
+        )
+    if kind == 'comments':
+        return Comment.objects.order_by('pk').values_list(
+            'pk', 'post_id', 'author__username', 'text', 'created'
+        )
+    return Follow.objects.order_by('pk').values_list(
+        'user__username', 'author__username'
+    )
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def write_records(file, fmt, kind, rows):
+    """Пишет строки в файл, возвращает их количество."""
+    fields = FIELDS[kind]
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(fields)
+    written = 0
+    for row in rows:
+        row = [_plain(value) for value in row]
+        if writer is not None:
+            writer.writerow(['' if value is None else value for value in row])
+        else:
+            record = dict(zip(fields, row))
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def read_records(file, fmt):
+    """Итератор записей-словарей из JSONL или CSV."""
+    if fmt == 'csv':
+        for record in csv.DictReader(file):
+            yield {key: value or None for key, value in record.items()}
+        return
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise TransferError(f'Строка {number}: {error}')
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def set_dates(model, field, dates):
+    """Записывает даты из пар ``(pk, дата)`` пачками UPDATE с CASE.
+
+    Нужна после ``bulk_create``: поле с ``auto_now_add`` получает в INSERT
+    текущее время вместо переданного.
+    """
+    for part in chunks(dates, DATES_BATCH):
+        model.objects.filter(pk__in=[pk for pk, _ in part]).update(**{
+            field: Case(
+                *[When(pk=pk, then=Value(date)) for pk, date in part],
+                output_field=DateTimeField(),
+            )
+        })
+
+
+class Importer:
+    """Загружает записи пачками через bulk_create.
+
+    Каждая пачка идёт в своей транзакции. Пользователи и группы ищутся
+    в словарях, которые дополняются одним запросом на пачку. Сигналы
+    при bulk_create не срабатывают, поэтому счётчики, ленты подписок,
+    поисковый индекс и версии кэша обновляются в ``refresh()``.
+    """
+
+    def __init__(self, kind, batch_size, create_missing=False):
+        self.kind = kind
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.users = {}
+        self.groups = {}
+        self.authors = set()
+        self.new_users = set()
+        self.commented = set()
+        self.created = set()
+        self.scopes = {'feed'}
+        self.imported = 0
+
+    def _lookup(self, known, model, field, keys, label):
+        missing = {key for key in keys if key and key not in known}
+        if not missing:
+            return
+        if self.create_missing:
+            model.objects.bulk_create(
+                [self._new(model, key) for key in missing],
+                ignore_conflicts=True,
+            )
+        found = dict(
+            model.objects.filter(**{f'{field}__in': missing})
+            .values_list(field, 'pk')
+        )
+        if self.create_missing and model is User:
+            # Созданным через bulk_create нужна строка статистики.
+            self.new_users.update(found.values())
+        known.update(found)
+        unknown = missing - set(known)
+        if unknown:
+            raise TransferError(
+                f'Не найдены {label}: ' + ', '.join(sorted(unknown))
+            )
+
+    @staticmethod
+    def _new(model, key):
+        if model is User:
+            user = User(username=key)
+            user.set_unusable_password()
+            return user
+        return Group(title=key, slug=key, description='')
+
+    def _resolve(self, records):
+        user_keys = set()
+        for record in records:
+            user_keys.update(
+                record.get(field) for field in ('author', 'user')
+            )
+        self._lookup(self.users, User, 'username', user_keys, 'пользователи')
+        if self.kind == 'posts':
+            self._lookup(
+                self.groups, Group, 'slug',
+                {record.get('group') for record in records}, 'группы'
+            )
+
+    def _date(self, value):
+        if not value:
+            return timezone.now()
+        date = parse_datetime(value)
+        if date is None:
+            raise TransferError(f'Некорректная дата: {value}')
+        return date
+
+    def _build(self, record):
+        author_id = self.users[record['author']]
+        if self.kind == 'posts':
+            group = record.get('group')
+            self.authors.add(author_id)
+            self.scopes.add(f'author:{author_id}')
+            if group:
+                self.scopes.add(f'group:{self.groups[group]}')
+            return Post(
+                pk=record.get('id'),
+                author_id=author_id,
+                group_id=self.groups[group] if group else None,
+                text=record['text'],
+                pub_date=self._date(record.get('pub_date')),
+                image=record.get('image') or '',
+            )
+        if self.kind == 'comments':
+            post_id = int(record['post'])
+            self.commented.add(post_id)
+            self.scopes.add(f'post:{post_id}')
+            return Comment(
+                pk=record.get('id'),
+                post_id=post_id,
+                author_id=author_id,
+                text=record['text'],
+                created=self._date(record.get('created')),
+            )
+        self.authors.add(author_id)
+        self.scopes.add(f'followers:{author_id}')
+        return Follow(user_id=self.users[record['user']], author_id=author_id)
+
+    def _restore_dates(self, model, objects, dates, last_pk):
+        """Записывает даты из файла в только что созданные строки.
+
+        SQLite не возвращает pk из ``bulk_create``: строки без id из файла
+        находятся по pk больше прежнего максимума, чужих вставок внутри
+        транзакции пачки нет.
+        """
+        pending = [obj for obj in objects if obj.pk is None]
+        if pending:
+            explicit = {obj.pk for obj in objects} - {None}
+            created = model.objects.filter(pk__gt=last_pk or 0).order_by(
+                'pk'
+            ).values_list('pk', flat=True)
+            created = [pk for pk in created if pk not in explicit]
+            for obj, pk in zip(pending, created):
+                obj.pk = pk
+        set_dates(model, DATE_FIELDS[self.kind], [
+            (obj.pk, date) for obj, date in zip(objects, dates)
+        ])
+
+    def import_batch(self, records):
+        model = {'posts': Post, 'comments': Comment, 'follows': Follow}
+        try:
+            with transaction.atomic():
+                self._resolve(records)
+                objects = [self._build(record) for record in records]
+                field = DATE_FIELDS.get(self.kind)
+                if field:
+                    dates = [getattr(obj, field) for obj in objects]
+                    last_pk = model[self.kind].objects.aggregate(
+                        last=Max('pk')
+                    )['last']
+                # Django 2.2 не урезает явный batch_size до лимита СУБД
+                # на число параметров в одном INSERT.
+                fields = model[self.kind]._meta.concrete_fields
+                model[self.kind].objects.bulk_create(
+                    objects,
+                    batch_size=min(
+                        self.batch_size,
+                        connection.ops.bulk_batch_size(fields, objects),
+                    ),
+                    ignore_conflicts=self.kind == 'follows',
+                )
+                if field:
+                    self._restore_dates(
+                        model[self.kind], objects, dates, last_pk
+                    )
+        except KeyError as error:
+            raise TransferError(f'Нет значения для {error}')
+        except IntegrityError as error:
+            raise TransferError(f'Пачка не загружена: {error}')
+        if field:
+            self.created.update(obj.pk for obj in objects)
+        self.imported += len(objects)
+        return len(objects)
+
+    def run(self, records):
+        """Импортирует все записи, по одной пачке за раз."""
+        for batch in chunks(records, self.batch_size):
+            yield self.import_batch(batch)
+
+    def refresh(self):
+        """Обновляет данные, которые обычно обновляют сигналы: счётчики
+        затронутых авторов и постов, статистику созданных пользователей,
+        ленты подписчиков и поисковый индекс загруженных записей."""
+        with transaction.atomic():
+            users = self.authors | self.new_users
+            for pks in chunks(sorted(users), REFRESH_BATCH):
+                recount_users(pks)
+            for pks in chunks(sorted(self.commented), REFRESH_BATCH):
+                recount_posts(pks)
+            follows = Follow.objects.filter(author_id__in=self.authors)
+            for follow in follows.iterator():
+                timeline.backfill(follow)
+            if self.created:
+                search.index_objects(**{self.kind: self.created})
+        cache.bump(*self.scopes)
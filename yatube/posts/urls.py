@@ -6,9 +6,26 @@ app_name = 'index'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/feed/<str:fmt>/',
+        views.group_feed,
+        name='group_feed'
+    ),
     path('', views.index, name='post_list'),
+    path('feed/<str:fmt>/', views.index_feed, name='feed'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/<str:fmt>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('search/', views.post_search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -1,7 +1,228 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
+from django.core.paginator import (EmptyPage, InvalidPage, Page,
+                                   PageNotAnInteger, Paginator)
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def paginator_func(obj, settings, page):
-    paginator = Paginator(obj, settings)
+FORWARD = 'n'
+BACKWARD = 'p'
+ELLIPSIS = '…'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию в ленте в непрозрачный токен для ?cursor=."""
+    raw = f'{direction}|{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора в (направление, значение, pk)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor('Некорректный курсор')
+    if direction not in (FORWARD, BACKWARD) or value is None:
+        raise InvalidCursor('Некорректный курсор')
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по паре (поле сортировки, ключ), по умолчанию
+    (pub_date, pk).
+
+    Страница выбирается условием WHERE по ключу последней показанной
+    записи вместо OFFSET, поэтому стоимость не зависит от глубины
+    страницы, а COUNT(*) не выполняется. Пагинатор описывает окно из
+    соседних страниц: ``number`` равен 2, если есть предыдущая страница,
+    ``num_pages`` учитывает только наличие следующей.
+    """
+
+    cursor_mode = True
+
+    def __init__(self, object_list, per_page, ordering='-pub_date',
+                 key='pk'):
+        super().__init__(object_list, per_page)
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.key = key
+        self.next_cursor = None
+        self.previous_cursor = None
+        self.num_pages = 1
+
+    def _order(self, reverse=False):
+        prefix = '-' if self.descending != reverse else ''
+        return self.object_list.order_by(
+            f'{prefix}{self.field}', f'{prefix}{self.key}'
+        )
+
+    def _seek(self, value, pk, reverse=False):
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'{self.key}__{lookup}': pk})
+        )
+
+    def page(self, cursor):
+        direction = FORWARD
+        if cursor:
+            direction, value, pk = decode_cursor(cursor)
+        reverse = direction == BACKWARD
+        queryset = self._order(reverse)
+        if cursor:
+            queryset = queryset.filter(self._seek(value, pk, reverse))
+        rows = list(queryset[:self.per_page + 1])
+        if reverse and len(rows) < self.per_page:
+            # Назад дошли до начала ленты неполной страницей: показываем
+            # первую страницу целиком, читая вперёд от первой записи.
+            cursor, reverse = None, False
+            rows = list(self._order()[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = bool(cursor), has_more
+        if rows and has_previous:
+            first = rows[0]
+            self.previous_cursor = encode_cursor(
+                BACKWARD, getattr(first, self.field), getattr(first, self.key)
+            )
+        if rows and has_next:
+            last = rows[-1]
+            self.next_cursor = encode_cursor(
+                FORWARD, getattr(last, self.field), getattr(last, self.key)
+            )
+        number = 2 if self.previous_cursor else 1
+        self.num_pages = number + (1 if self.next_cursor else 0)
+        return self._get_page(rows, number, self)
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации вокруг страницы ``number``.
+
+    Первые и последние ``on_ends`` страниц и окно ±``on_each_side``
+    вокруг текущей, пропуски обозначены ``ELLIPSIS``. Вычисляются только
+    показываемые номера, так что длина не зависит от ``num_pages``.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from range(1, num_pages + 1)
+        return
+    if number > on_each_side + on_ends + 2:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+class WindowedPage(Page):
+    @property
+    def page_links(self):
+        """Ссылки навигации: номера страниц и ``ELLIPSIS`` на месте
+        пропусков; без известного числа страниц — многоточие в конце.
+        """
+        links = list(elided_page_range(
+            self.number, self.paginator.num_pages,
+            self.paginator.on_each_side, self.paginator.on_ends
+        ))
+        if not self.paginator.count_known and self.has_next():
+            links.append(ELLIPSIS)
+        return links
+
+
+class WindowedPaginator(Paginator):
+    """Нумерованный пагинатор с сокращённым списком страниц."""
+
+    ELLIPSIS = ELLIPSIS
+    cursor_mode = False
+    count_known = True
+    on_each_side = 2
+    on_ends = 1
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class UncountedPaginator(WindowedPaginator):
+    """Нумерованный пагинатор без COUNT(*) для очень больших выборок.
+
+    Страница читается с одной лишней записью: по ней видно, есть ли
+    следующая. Как и у ``CursorPaginator``, ``num_pages`` описывает
+    только окно до следующей страницы, а ``count`` — записи до неё.
+    """
+
+    count_known = False
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет записей')
+        self.count = bottom + len(rows)
+        self.num_pages = number + (1 if len(rows) > self.per_page else 0)
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except InvalidPage:
+            return self.page(1)
+
+
+def paginator_func(obj, settings, page, cursor=None, keyset=False,
+                   count=None, ordering='-pub_date', key='pk',
+                   count_limit=None):
+    """Возвращает страницу ленты.
+
+    При переданном курсоре (или ``keyset=True`` без номера страницы)
+    используется keyset-пагинация, иначе обычная нумерованная.
+    Известное заранее ``count`` избавляет от запроса COUNT(*). С
+    ``count_limit`` записи считаются не дальше этого числа, а для
+    выборок больше него число страниц не определяется вовсе.
+    """
+    if cursor or (keyset and not page):
+        return CursorPaginator(obj, settings, ordering, key).get_page(cursor)
+    paginator = WindowedPaginator(obj, settings)
+    if count is not None:
+        paginator.count = count
+    elif count_limit is not None:
+        count = obj[:count_limit + 1].count()
+        if count > count_limit:
+            paginator = UncountedPaginator(obj, settings)
+        else:
+            paginator.count = count
     page_obj = paginator.get_page(page)
     return page_obj
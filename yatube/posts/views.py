@@ -1,65 +1,265 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
 
+from core.streaming import stream_template
+
+from . import feeds, search, thumbnails
+from .cache import (cached_page, conditional_page, feed_cache_context,
+                    page_versions)
+from .counters import recount_users
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .timeline import FEED_KEY, FEED_ORDERING, follow_feed
 from .utils import paginator_func
 
 
+def _page_object(request, queryset, **lookup):
+    """Объект страницы: один запрос и для валидаторов, и для представления."""
+    if not hasattr(request, '_page_object'):
+        request._page_object = queryset.filter(**lookup).first()
+    return request._page_object
+
+
+def _group_scopes(request, slug):
+    group = _page_object(request, Group.objects.all(), slug=slug)
+    return None if group is None else [f'group:{group.pk}']
+
+
+def _profile_author(request, username):
+    """Автор профиля со статистикой и, для вошедшего пользователя,
+    признаком подписки: всё одним запросом вместо отдельного EXISTS.
+    """
+    authors = User.objects.select_related('stats')
+    if request.user.is_authenticated:
+        authors = authors.annotate(followed_by_viewer=Exists(
+            Follow.objects.filter(user=request.user, author=OuterRef('pk'))
+        ))
+    return _page_object(request, authors, username=username)
+
+
+def _author_stats(author):
+    """Статистика автора; недостающую строку (например, после массовой
+    загрузки в обход сигналов) создаёт пересчётом."""
+    try:
+        return author.stats
+    except UserStats.DoesNotExist:
+        recount_users([author.pk])
+        author.stats = UserStats.objects.get(user=author)
+        return author.stats
+
+
+def _profile_scopes(request, username):
+    author = _profile_author(request, username)
+    if author is None:
+        return None
+    return [f'author:{author.pk}', f'followers:{author.pk}']
+
+
+def _post_scopes(request, post_id):
+    post = _page_object(
+        request, Post.objects.select_related('author__stats', 'group'),
+        pk=post_id
+    )
+    if post is None:
+        return None
+    return [f'post:{post.pk}', f'author:{post.author_id}']
+
+
+@conditional_page(lambda request: ['feed'])
+@cached_page(lambda request: ['feed'], shared=True)
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_feed()
     page_obj = paginator_func(posts,
                               settings.POSTS_PAGE,
-                              request.GET.get('page'))
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+                              request.GET.get('page'),
+                              request.GET.get('cursor'),
+                              keyset=True,
+                              count_limit=settings.PAGINATOR_COUNT_LIMIT)
+    context = {
+        'page_obj': page_obj,
+        **feed_cache_context(request, 'feed'),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@conditional_page(_group_scopes)
+@cached_page(_group_scopes, shared=True)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
+    group = _page_object(request, Group.objects.all(), slug=slug)
+    if group is None:
+        raise Http404
+    posts = Post.objects.filter(group=group).for_feed()
     page_obj = paginator_func(posts,
                               settings.POSTS_PAGE,
-                              request.GET.get('page'))
+                              request.GET.get('page'),
+                              request.GET.get('cursor'),
+                              count_limit=settings.PAGINATOR_COUNT_LIMIT)
     context = {
         'group': group,
         'page_obj': page_obj,
+        **feed_cache_context(request, f'group:{group.pk}'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(_profile_scopes)
+@cached_page(_profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = _profile_author(request, username)
+    if author is None:
+        raise Http404
+    posts = author.posts.for_feed()
     page_obj = paginator_func(posts,
                               settings.POSTS_PAGE,
-                              request.GET.get('page'))
+                              request.GET.get('page'),
+                              request.GET.get('cursor'),
+                              count=_author_stats(author).posts_count)
     context = {
         'page_obj': page_obj,
         'author': author,
+        **feed_cache_context(request, f'author:{author.pk}'),
     }
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
-        context['following'] = following
+        context['following'] = author.followed_by_viewer
     return render(request, 'posts/profile.html', context)
 
 
+def _feed_response(request, fmt, title, link, posts, scopes):
+    if fmt not in feeds.FORMATS:
+        raise Http404
+    version = max(page_versions(request, scopes))
+    content = feeds.render(request, fmt, title, link, posts, version)
+    return HttpResponse(content, content_type=feeds.FORMATS[fmt])
+
+
+@conditional_page(lambda request, fmt: ['feed'])
+def index_feed(request, fmt):
+    return _feed_response(request, fmt, 'Последние обновления на сайте',
+                          reverse('posts:post_list'), Post.objects.all(),
+                          ['feed'])
+
+
+def _group_feed_scopes(request, slug, fmt):
+    return _group_scopes(request, slug)
+
+
+@conditional_page(_group_feed_scopes)
+def group_feed(request, slug, fmt):
+    group = _page_object(request, Group.objects.all(), slug=slug)
+    if group is None:
+        raise Http404
+    return _feed_response(request, fmt, f'Записи сообщества {group}',
+                          reverse('posts:group_list', args=[group.slug]),
+                          Post.objects.filter(group=group),
+                          [f'group:{group.pk}'])
+
+
+def _profile_feed_scopes(request, username, fmt):
+    author = _page_object(request, User.objects.all(), username=username)
+    return None if author is None else [f'author:{author.pk}']
+
+
+@conditional_page(_profile_feed_scopes)
+def profile_feed(request, username, fmt):
+    author = _page_object(request, User.objects.all(), username=username)
+    if author is None:
+        raise Http404
+    name = author.get_full_name() or author.username
+    return _feed_response(request, fmt, f'Посты пользователя {name}',
+                          reverse('posts:profile', args=[author.username]),
+                          author.posts.all(), [f'author:{author.pk}'])
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    post_ids = search.search_posts(query) if query else []
+    page_obj = paginator_func(post_ids,
+                              settings.POSTS_PAGE,
+                              request.GET.get('page'))
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'paginator_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(_post_scopes)
+@cached_page(_post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = _page_object(
+        request, Post.objects.select_related('author__stats', 'group'),
+        pk=post_id
+    )
+    if post is None:
+        raise Http404
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.all().filter(post=post)
+    comments = comments_page(post.pk, request.GET.get('comments'))
     context = {
         'post': post,
         'form': form,
         'comments': comments
     }
+    if len(comments) >= settings.COMMENTS_STREAM_MIN:
+        return stream_template(
+            request, 'posts/post_detail.html', context,
+            {'comments': _comment_batches(request, comments)}
+        )
     return render(request, 'posts/post_detail.html', context)
 
 
+def _comment_batches(request, comments):
+    """HTML комментариев страницы частями по COMMENTS_STREAM_BATCH."""
+    batch = settings.COMMENTS_STREAM_BATCH
+    for start in range(0, len(comments), batch):
+        yield render_to_string(
+            'posts/includes/comment_list.html',
+            {'comments': comments[start:start + batch]},
+            request
+        )
+
+
+def comments_page(post_id, cursor):
+    """Страница комментариев поста в порядке написания."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    return paginator_func(comments,
+                          settings.COMMENTS_PAGE,
+                          None,
+                          cursor,
+                          keyset=True,
+                          ordering='created')
+
+
+def post_comments(request, post_id):
+    """Следующая страница комментариев для подгрузки на странице поста."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = comments_page(post.pk, request.GET.get('cursor'))
+    html = render_to_string(
+        'posts/includes/comment_list.html',
+        {'comments': comments},
+        request
+    )
+    return JsonResponse({
+        'html': html,
+        'next': comments.paginator.next_cursor,
+    })
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
@@ -67,11 +267,13 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -84,6 +286,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -94,6 +298,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -107,31 +312,32 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    follows = Follow.objects.filter(user=request.user)
-    post_list = Post.objects.filter(author__in=follows.values('author'))
+    post_list = follow_feed(request.user).for_feed()
 
     page_obj = paginator_func(post_list,
                               settings.POSTS_PAGE,
-                              request.GET.get('page'))
+                              request.GET.get('page'),
+                              request.GET.get('cursor'),
+                              keyset=True,
+                              ordering=FEED_ORDERING,
+                              key=FEED_KEY,
+                              count_limit=settings.PAGINATOR_COUNT_LIMIT)
 
     return render(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
+        Follow.objects.follow(request.user, author)
     return redirect('posts:profile', username)
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author)
-    if follow.exists():
-        follow.delete()
+    Follow.objects.unfollow(request.user, author)
     return redirect('posts:profile', username)
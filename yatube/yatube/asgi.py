@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no native ASGI handler, so requests are served by the WSGI
+application from yatube.wsgi (with its static files and template warm-up)
+in a thread pool of ``settings.ASGI_THREADS`` workers.
+"""
+
+import os
+
+from django.conf import settings
+
+from core.asgi import WsgiToAsgi
+
+from .wsgi import application as wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(wsgi_application, max_workers=settings.ASGI_THREADS)
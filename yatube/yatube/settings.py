@@ -41,12 +41,56 @@ LOGIN_REDIRECT_URL = 'posts:post_list'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 POSTS_PAGE = 10
+COMMENTS_PAGE = 50
+# Страница поста с таким числом комментариев отдаётся потоком
+# (core.streaming): комментарии рендерятся и уходят частями по BATCH.
+COMMENTS_STREAM_MIN = 20
+COMMENTS_STREAM_BATCH = 10
+# Нумерованная пагинация считает записи не дальше этого числа; в более
+# длинных лентах число страниц не определяется и ссылки на последнюю нет.
+PAGINATOR_COUNT_LIMIT = 10000
+# Число записей в лентах Atom и JSON Feed.
+FEED_ITEMS = 20
+# JSON API: размер страницы по умолчанию и верхняя граница ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 1000
+# Лента подписок: посты авторов, у которых больше постов, чем порог,
+# не копируются в ленту подписчика, а дочитываются при запросе.
+FOLLOW_FEED_PULL_THRESHOLD = 1000
+# Новый пост раскладывается по лентам сразу, если у автора не больше
+# стольких подписчиков; раскладка для популярных авторов идёт в очереди.
+FOLLOW_FEED_FAN_OUT_INLINE = 100
+FOLLOW_FEED_BATCH = 500
+# Миниатюры картинок постов: имя варианта -> (геометрия, опции sorl).
+# Генерируются в фоне после сохранения поста, шаблоны берут готовый URL.
+POST_THUMBNAILS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Полнотекстовый поиск (posts.search): fts5, inverted или auto — FTS5,
+# если таблица индекса есть в SQLite, иначе обратный индекс в файле.
+SEARCH_BACKEND = os.getenv('YATUBE_SEARCH_BACKEND', 'auto')
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR, 'search_index.json')
+SEARCH_MAX_RESULTS = 1000
+# Базовые линии manage.py benchmark. Время ответа зависит от машины,
+# поэтому линия снимается локально (--save-baseline) и не коммитится.
+BENCHMARK_DIR = os.path.join(BASE_DIR, 'benchmarks')
+# Очередь фоновых задач (core.tasks) хранится в основной базе.
+# Задачи выполняет manage.py run_tasks. При TASKS_EAGER задача
+# выполняется без очереди сразу после фиксации транзакции, которая её
+# поставила.
+TASKS_EAGER = os.getenv('YATUBE_TASKS_EAGER', '0') == '1'
+TASKS_WORKERS = 4
+TASKS_BATCH = 50
+TASKS_MAX_ATTEMPTS = 5
+TASKS_LOCK_TIMEOUT = 5 * 60
+TASKS_POLL_INTERVAL = 1
 # Application definition
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
     'django.contrib.admin',
@@ -59,6 +103,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,11 +114,21 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Сжатие ответов (core.middleware.CompressionMiddleware): типы, которые
+# сжимаются, минимальный размер тела в байтах и уровни gzip и brotli.
+COMPRESSION_CONTENT_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'application/json',
+    'application/javascript', 'application/xml', 'application/atom+xml',
+    'application/feed+json', 'image/svg+xml',
+)
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_LEVELS = {'gzip': 6, 'br': 5}
+
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.templates.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,17 +142,42 @@ TEMPLATES = [
         },
     },
 ]
+# Компилировать все шаблоны при старте yatube.wsgi / yatube.asgi
+# (core.templates.warm). Имеет смысл вместе с кэширующим загрузчиком
+# из settings_production, иначе скомпилированные шаблоны не хранятся.
+TEMPLATES_WARM_ON_STARTUP = os.getenv('YATUBE_TEMPLATES_WARM', '0') == '1'
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых yatube.asgi выполняет запросы (core.asgi.WsgiToAsgi).
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', 8))
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.db.backends.sqlite3 выполняет PRAGMA из OPTIONS['pragmas'] на каждом
+# новом соединении. WAL позволяет читать во время записи, synchronous=NORMAL
+# в режиме WAL не теряет целостность при сбое процесса, busy_timeout
+# заставляет запись ждать блокировку вместо ошибки. Соединения живут
+# CONN_MAX_AGE секунд и переиспользуются между запросами одного потока.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -138,13 +219,70 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Сюда собирает статику collectstatic. В settings_production хранилище
+# добавляет к именам хэш содержимого и кладёт рядом сжатые .gz/.br.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Отдавать собранную статику из yatube.wsgi без Django
+# (core.staticfiles.handlers) — для запуска без отдельного веб-сервера.
+STATIC_SERVE = os.getenv('YATUBE_STATIC_SERVE', '0') == '1'
+# Cache-Control файлов с хэшем в имени и остальных, в секундах.
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_UNHASHED_MAX_AGE = 60
+# Какие файлы collectstatic сжимает заранее.
+STATIC_COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.xml', '.html',
+)
+STATIC_COMPRESS_MIN_SIZE = 256
+
+# Бэкенд кэша выбирается переменной окружения YATUBE_CACHE:
+# locmem (по умолчанию, свой кэш у каждого процесса), file и sqlite
+# (общий кэш для всех воркеров на одном хосте) или redis.
+CACHE_LOCATION = os.getenv('YATUBE_CACHE_LOCATION')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache.backends.instrumented.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'core.cache.backends.instrumented.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.backends.instrumented.SQLiteCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'redis': {
+        'BACKEND': 'core.cache.backends.instrumented.RedisCache',
+        'LOCATION': CACHE_LOCATION or 'redis://127.0.0.1:6379/0',
+    },
+}
 
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[os.getenv('YATUBE_CACHE', 'locmem')],
+}
+
+# Время жизни записей по областям кэша (core.cache.Namespace), в секундах.
+# Ленты сбрасываются явно при изменении постов и комментариев, их таймаут
+# лишь ограничивает время жизни неиспользуемых записей.
+CACHE_TTL = {
+    'feeds': 60 * 60,
+    'syndication': 60 * 60,
+    'pages': 60 * 60,
+    'api': 60 * 5,
 }
 
+# Метрики запросов (core.middleware.InstrumentationMiddleware). /metrics
+# отдаётся только адресам из METRICS_ALLOWED_IPS, пустой список — всем.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+METRICS_SERVER_TIMING = True
+# Запросы дольше порога пишутся в лог core.metrics вместе с первыми
+# METRICS_SLOW_SQL_LIMIT SQL-запросами, доля записей — METRICS_SLOW_SAMPLE_RATE.
+METRICS_SLOW_REQUEST_SECONDS = 0.5
+METRICS_SLOW_SAMPLE_RATE = 1.0
+METRICS_SLOW_SQL_LIMIT = 50
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -0,0 +1,48 @@
+"""
+Production settings for yatube project.
+
+Use with ``DJANGO_SETTINGS_MODULE=yatube.settings_production``. The secret
+key and allowed hosts come from the environment, and templates are loaded
+through the cached loader: each template is compiled once per process and
+warmed on startup (see ``core.templates.warm``). ``collectstatic`` writes
+hashed file names with precompressed copies, which yatube.wsgi serves
+itself unless ``YATUBE_STATIC_SERVE=0`` (see ``core.staticfiles``).
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import SECRET_KEY, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.getenv('YATUBE_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.getenv(
+    'YATUBE_ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]'
+).split(',')
+
+# Кэширующий загрузчик не разрешён вместе с APP_DIRS, поэтому загрузчики
+# каталогов приложений перечислены явно.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+TEMPLATES_WARM_ON_STARTUP = os.getenv('YATUBE_TEMPLATES_WARM', '1') == '1'
+
+STATICFILES_STORAGE = (
+    'core.staticfiles.storage.CompressedManifestStaticFilesStorage'
+)
+STATIC_SERVE = os.getenv('YATUBE_STATIC_SERVE', '1') == '1'
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from core.staticfiles.handlers import StaticFilesApplication
+from core.templates import warm_on_startup
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+if settings.STATIC_SERVE:
+    application = StaticFilesApplication(application)
+warm_on_startup()